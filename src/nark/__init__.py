@@ -17,11 +17,14 @@ from .enum import enum, bitflags
 from .logging import Logging
 from .factory import Factory
 from .assets import Assets, BadFileException
-from .implements import implements, ImplementsException
-from .resolve import ResolveFailedException, Scope, resolve
+from .implements import implements, implementations, provides, implements_mode, ImplementsMode, ImplementsException
+from .resolve import ResolveFailedException, Scope, resolve, inject, injection_plan
 from .exception import exception
+from .lazy import Lazy
+from .pool import Pool, PoolExhaustedException
 from .run import run, BadCommandException
-from .dynamic import Dynamic
+from .dynamic import Dynamic, FrozenDynamic
+from .table import DynamicTable
 from .time_ import DateTime, Timestamp
 import nark.process
 
@@ -37,13 +40,24 @@ __all__ = [
   'ResolveFailedException',
   'Scope',
   'resolve',
+  'inject',
+  'injection_plan',
+  'Lazy',
+  'Pool',
+  'PoolExhaustedException',
   'implements',
   'ImplementsException',
+  'implementations',
+  'provides',
+  'implements_mode',
+  'ImplementsMode',
   'exception',
   'run',
   'BadCommandException',
   'process',
   'Dynamic',
+  'FrozenDynamic',
+  'DynamicTable',
   'DateTime',
   'Timestamp'
 ]
@@ -0,0 +1,137 @@
+# Copyright 2013 Douglas Linder
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Asyncio support for Scope; python 3.7+ only.
+
+    This module is imported on demand by Scope.register() and
+    Scope.aresolve(), so the rest of nark still imports on older
+    pythons.
+"""
+
+from __future__ import absolute_import
+from .exception import exception
+from .resolve import ResolveFailedException, injection_plan
+import contextvars
+import asyncio
+import inspect
+
+
+async def aresolve(scope, T):
+  """ Resolve the given type into an instance, awaiting async factories """
+  binding = scope.binding(T)
+  if isinstance(binding, AsyncBinding):
+    return await binding.aresolve()
+  return binding.resolve()
+
+
+class AsyncBinding(object):
+  """ Binding of a type created by an async factory.
+
+      The factory is a coroutine function, invoked with any of its
+      arguments that default to a type bound in the scope; they are
+      resolved concurrently, using aresolve(), eg.
+
+      async def connect(config=IConfig, log=ILog):
+        return await Db.connect(config)
+
+      Singletons are created once; concurrent awaiters all wait on
+      the same creation rather than starting their own.
+  """
+
+  def __init__(self, T, factory, per_call, scope):
+    if not inspect.iscoroutinefunction(factory):
+      raise TypeError("Factory for '%s' is not a coroutine function: %r" % (T.__name__, factory))
+    self.__type = T
+    self.__factory = factory
+    self.__per_call = per_call
+    self.__scope = scope
+    self.__plan = injection_plan(factory)
+    self.__instance = None
+    self.__created = False
+    self.__task = None
+    self.stats = None
+
+  @property
+  def type(self):
+    """ The bound type """
+    return self.__type
+
+  def is_singleton(self):
+    """ Always False; async singletons cannot be created synchronously """
+    return False
+
+  def dependencies(self):
+    """ Return the interfaces the factory is injected with """
+    return [I for _, I in self.__plan]
+
+  def clear(self):
+    """ Clear held instances """
+    self.__instance = None
+    self.__created = False
+    self.__task = None
+
+  def resolve(self):
+    """ Always fails; async bindings must be resolved with aresolve() """
+    raise ResolveFailedException(self.__type, "async factory bindings must be resolved with aresolve()")
+
+  def compile(self):
+    """ See Binding.compile() """
+    return self.resolve
+
+  async def aresolve(self):
+    """ Resolve the given type into an instance """
+    chain = _constructing.get()
+    if self in chain:
+      names = " -> ".join(b.type.__name__ for b in chain[chain.index(self):] + (self,))
+      raise ResolveFailedException(self.__type, "dependency cycle %s" % names)
+    if self.__per_call:
+      return await self.instance()
+    if self.__created:
+      return self.__instance
+    task = self.__task
+    if task is None:
+      task = self.__task = asyncio.ensure_future(self.instance())
+    try:
+      instance = await asyncio.shield(task)
+    except Exception:
+      if self.__task is task:
+        self.__task = None
+      raise
+    if self.__task is task:
+      self.__instance = instance
+      self.__created = True
+      self.__task = None
+    return instance
+
+  async def instance(self):
+    """ Return a new instance from the factory """
+    token = _constructing.set(_constructing.get() + (self,))
+    try:
+      scope = self.__scope
+      plan = [(key, I) for key, I in self.__plan if I in scope]
+      values = await asyncio.gather(*[scope.aresolve(I) for _, I in plan])
+      kwargs = dict((key, value) for (key, _), value in zip(plan, values))
+      try:
+        return await self.__factory(**kwargs)
+      except Exception:
+        e = exception()
+        raise ResolveFailedException(self.__type, e)
+    finally:
+      _constructing.reset(token)
+
+  def __repr__(self):
+    return "<AsyncBinding(type=%s, factory=%s, per_call=%s, created=%s)" % (self.__type.__name__, self.__factory.__name__, self.__per_call, self.__created)
+
+
+# Async bindings being created in the current task
+_constructing = contextvars.ContextVar("nark.async_.constructing", default=())
@@ -11,6 +11,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+import weakref
+import marshal
+import codecs
+import json
+import sys
+
+try:
+  _intern = sys.intern
+except AttributeError:  # python 2
+  _intern = intern
+
+
 class Dynamic(object):
   """ Dynamic reflective dictionary.
 
@@ -44,42 +57,120 @@ class Dynamic(object):
 
       Obviously you are limited to python variable name compliant
       keys using this object.
+
+      A key with the same name as a method (keys, values, get, path,
+      to_dict, snapshot, etc.) hides that method on the object which
+      holds it; call the method through the class instead, eg.
+
+      Dynamic.get(i, "x.y")
+
+      Converting a large dictionary copies the whole tree up front;
+      to avoid that, use:
+
+      i = Dynamic(d, lazy=True)
+
+      Which wraps the dictionary instead, and only creates the child
+      Dynamic for a key the first time it is accessed. The source
+      dictionary is not modified, but must not be changed by anything
+      else while it is wrapped.
+
+      If you convert the same object into a dictionary repeatedly,
+      use to_dict() rather than dict(iter(i)); see to_dict().
+
+      To load large JSON documents, use from_json_stream() (for a
+      top-level array) or from_ndjson(), which build Dynamics
+      directly while parsing, one record at a time.
+
+      To read a value which might be missing, without creating it:
+
+      z = i.get("x.y.z", default)
+
+      When reading the same paths from many objects, see path() and
+      extract().
+
+      To share the object between threads while it may still change,
+      give readers a snapshot() instead; see FrozenDynamic.
+
+      A Dynamic pickles as the equivalent plain dictionary; to send
+      one without pickle, see to_bytes().
+
+      To keep a copy in another process up to date, send only what
+      has changed, using journal() and changes(), or diff(), and
+      apply() the changes to the copy.
   """
 
-  def __init__(self, src=None):
+  __slots__ = ("__dict__", "__weakref__", "_Dynamic__source", "_Dynamic__track")
+
+  def __init__(self, src=None, lazy=False):
+    object.__setattr__(self, "_Dynamic__source", None)
+    object.__setattr__(self, "_Dynamic__track", None)
     if src is not None:
-      for k in src.keys():
-        value = src[k]
-        if isinstance(value, dict):
-          value = Dynamic(value)
-        setattr(self, k, value)
+      if lazy:
+        object.__setattr__(self, "_Dynamic__source", src)
+        for key in _reserved:
+          if key in src:
+            self.__load(key)
+      else:
+        values = self.__dict__
+        for k in _keys(src):
+          value = src[k]
+          if isinstance(value, dict):
+            value = Dynamic(value)
+          values[k] = value
 
   def __getattr__(self, key):
+    if key[:2] == "__" and key[-2:] == "__":
+      raise AttributeError(key)
+    if self.__source is not None and key in self.__source:
+      return self.__load(key)
     if key not in self.__dict__.keys():
-      self.__dict__[key] = Dynamic()
+      self.__setitem__(key, Dynamic())
     return self.__dict__[key]
 
   def __setattr__(self, key, value):
     self.__dict__[key] = value
+    if self.__track is not None:
+      self.__changed(key, value)
 
   def __getitem__(self, key):
     if key not in self.__dict__.keys():
-      self.__dict__[key] = Dynamic()
+      if self.__source is not None and key in self.__source:
+        return self.__load(key)
+      self.__setitem__(key, Dynamic())
     return self.__dict__[key]
 
   def __setitem__(self, key, value):
     self.__dict__[key] = value
+    if self.__track is not None:
+      self.__changed(key, value)
+
+  def __delattr__(self, key):
+    try:
+      self.__delitem__(key)
+    except KeyError:
+      raise AttributeError(key)
+
+  def __delitem__(self, key):
+    if self.__source is not None:
+      self.__load_all()  # <-- Otherwise the key is loaded again from the source
+    del self.__dict__[key]
+    track = self.__track
+    if track is not None:
+      self.__invalidate()
+      if track.journaled:
+        self.__record(("delete", (key,)))
 
   def __call__(self, *args, **kwargs):
     return None
 
   def __str__(self):
-    rtn = dict(self)
+    rtn = dict(Dynamic.to_dict(self))
     for key in rtn.keys():
       rtn[key] = str(rtn[key])
     return str(rtn)
 
   def __iter__(self):
+    self.__load_all()
     for k in self.__dict__.keys():
       value = self.__dict__[k]
       if isinstance(value, Dynamic):
@@ -88,16 +179,724 @@ class Dynamic(object):
         yield k, value
 
   def __contains__(self, key):
-    return key in self.__dict__
+    if key in self.__dict__:
+      return True
+    return self.__source is not None and key in self.__source
 
   def keys(self):
+    self.__load_all()
     try:
       return self.__dict__.viewkeys()
     except:  # python 3
       return self.__dict__.keys()
 
   def values(self):
+    self.__load_all()
     try:
       return self.__dict__.viewvalues()
     except:  # python 3
       return self.__dict__.values()
+
+  @staticmethod
+  def from_json_stream(fileobj, chunk_size=65536):
+    """ Iterate over the Dynamics in a JSON document, eg.
+
+        with open("records.json", "rb") as fp:
+          for record in Dynamic.from_json_stream(fp):
+            pass
+
+        If the document is an array, each item is yielded as soon as
+        it has been read, so only one item is held in memory at a
+        time. Only the items of a top-level array are streamed: any
+        other document, including an object holding a large array,
+        is read into memory whole and then yielded as one Dynamic.
+
+        fileobj is anything with a read() method, including an mmap,
+        and may return either text or utf-8 bytes. Objects are built
+        directly as Dynamics while parsing, rather than converting a
+        parsed dictionary afterwards.
+    """
+    return iter(_JsonStream(fileobj, chunk_size))
+
+  @staticmethod
+  def from_ndjson(fileobj):
+    """ Iterate over the Dynamics in a newline delimited JSON file.
+
+        fileobj is anything with a readline() method, including an
+        mmap; blank lines are skipped.
+    """
+    while True:
+      line = fileobj.readline()
+      if not line:
+        break
+      if isinstance(line, bytes) and bytes is not str:
+        line = line.decode("utf-8")
+      line = line.strip()
+      if line:
+        value = _decoder.decode(line)
+        yield _unwrap(value) if isinstance(value, list) else value
+
+  def get(self, path, default=None):
+    """ Return the value at a dotted path, or default if it is missing.
+
+        Unlike attribute access, missing keys are never created. If
+        the object has a "get" key, use Dynamic.get(i, path).
+    """
+    return Dynamic.path(path)(self, default)
+
+  @staticmethod
+  def path(path):
+    """ Return a compiled accessor for a dotted path, eg.
+
+        name = Dynamic.path("user.profile.name")
+        for record in records:
+          print(name(record, "unknown"))
+
+        Calling the accessor is equivalent to record.get(path, default)
+        but faster; it reads the nested values directly, rather than
+        through a chain of attribute lookups. Accessors are cached, so
+        repeated calls for the same path don't compile it again; the
+        cache is emptied once it holds 1000 paths.
+
+        The path steps through Dynamics and dicts by key, and any other
+        objects by attribute.
+    """
+    try:
+      return _paths[path]
+    except KeyError:
+      pass
+    with _lock:
+      if path not in _paths:
+        if len(_paths) >= _MAX_PATHS:
+          _paths.clear()
+        keys = tuple(path.split("."))
+        namespace = {"keys": keys, "lookup": _lookup}
+        exec(_COMPILED_PATH.replace("CHAIN", _chain(keys)), namespace)
+        _paths[path] = namespace["accessor"]
+      return _paths[path]
+
+  @staticmethod
+  def extract(records, paths, default=None):
+    """ Iterate over a tuple of the values at each path, for each record, eg.
+
+        for name, age in Dynamic.extract(records, ["user.name", "user.age"]):
+          pass
+
+        Missing values are default, and are not created.
+
+        One function is compiled to read every path of a record in a
+        single step; only records with a missing value fall back to
+        the path() accessor for each path.
+    """
+    namespace = {}
+    values = []
+    fallback = []
+    for i, path in enumerate(paths):
+      namespace["accessor%d" % i] = Dynamic.path(path)
+      values.append("record%s," % _chain(path.split(".")))
+      fallback.append("accessor%d(record, default)," % i)
+    code = _COMPILED_EXTRACT.replace("VALUES", " ".join(values)).replace("FALLBACK", " ".join(fallback))
+    exec(code, namespace)
+    return namespace["extract"](records, default)
+
+  def to_bytes(self, codec="marshal"):
+    """ Encode the object as bytes, using marshal or msgpack.
+
+        Only plain values (dicts, lists, strings, numbers, etc.) can
+        be encoded. The marshal format depends on the python version;
+        use it between processes running the same python, eg. for a
+        Messenger, and msgpack (if it is installed) otherwise.
+    """
+    return _codec(codec)[0](Dynamic.to_dict(self))
+
+  @staticmethod
+  def from_bytes(data, codec="marshal"):
+    """ Return a Dynamic decoded from the result of to_bytes() """
+    return Dynamic(_codec(codec)[1](data), True)
+
+  def __reduce__(self):
+    return _restore, (Dynamic.to_dict(self),)
+
+  def journal(self, enabled=True):
+    """ Start (or stop) recording changes to this object; see changes().
+
+        Only this object and the Dynamics nested in it do any extra
+        work to record changes, and they stop when it stops (or is
+        garbage collected).
+    """
+    track = self.__tracking()
+    if enabled and track.journal is None:
+      track.journal = []
+      self.__follow()
+    elif not enabled and track.journal is not None:
+      track.journal = None
+      self.__unfollow()
+
+  def changes(self):
+    """ Return the changes recorded since the last call, and clear them.
+
+        Every key assigned or deleted, on this object or any nested
+        Dynamic, is recorded by its path from this object, as one of:
+
+        ("set", ("x", "y"), value)
+        ("delete", ("x", "y"))
+
+        Nested Dynamics are recorded as dicts, so the changes can be
+        pickled or encoded, and passed to apply() in another process.
+        Changes made inside other mutable values, eg. appending to a
+        list, are not recorded.
+    """
+    track = self.__track
+    if track is None or track.journal is None:
+      return []
+    journal = track.journal
+    track.journal = []
+    return journal
+
+  @staticmethod
+  def diff(a, b):
+    """ Return the changes which turn a into b; see changes() and apply().
+
+        a and b are Dynamics or dicts. Unchanged branches shared by
+        both, eg. by two results of to_dict(), are skipped without
+        being compared.
+    """
+    patch = []
+    _diff(_plain(a), _plain(b), (), patch)
+    return patch
+
+  def apply(self, patch):
+    """ Apply changes from changes() or diff() to this object in place """
+    for change in patch:
+      op, keys = change[0], change[1]
+      node = self
+      for key in keys[:-1]:
+        node = node[key]
+      if op == "set":
+        value = change[2]
+        if isinstance(value, dict):
+          value = Dynamic(value)
+        node[keys[-1]] = value
+      elif op == "delete":
+        del node[keys[-1]]
+      else:
+        raise ValueError("Unknown change '%s' for %r" % (op, keys))
+
+  def freeze(self):
+    """ Return an immutable FrozenDynamic copy of this object; see snapshot() """
+    return Dynamic.snapshot(self)
+
+  def snapshot(self):
+    """ Return the current state of the object as a FrozenDynamic.
+
+        Like to_dict(), the result is cached on each node, and later
+        snapshots only rebuild the nodes changed since; every other
+        nested FrozenDynamic is shared between the snapshots, so a
+        snapshot after a small change costs O(depth), not O(size).
+
+        Snapshots never change, so you can hand one to other threads
+        and keep changing this object, eg.
+
+        config.db.host = "localhost"
+        current = config.snapshot()  # <-- readers use current
+
+        Changes made inside other mutable values, eg. appending to a
+        list, are not tracked.
+    """
+    track = self.__tracking()
+    rtn = track.frozen
+    if rtn is None:
+      self.__load_all()
+      values = {}
+      for k, value in self.__dict__.items():
+        if isinstance(k, str):
+          k = _intern(k)
+        if isinstance(value, FrozenDynamic):
+          values[k] = value
+        elif isinstance(value, Dynamic):
+          value.__link(self, k)
+          values[k] = Dynamic.snapshot(value)
+        else:
+          values[k] = _frozen(value)
+      rtn = _frozen_from(values)
+      track.frozen = rtn
+    return rtn
+
+  def to_dict(self):
+    """ Return the object as a dictionary, with nested Dynamics as dicts.
+
+        The result is cached on each node, and only rebuilt for the
+        nodes changed (by assigning a key) since the last call; so
+        converting a large tree again after a small change only
+        rebuilds the path from the change to the root, and every
+        other nested dictionary is reused.
+
+        Because of that, the returned dictionary is shared, and must
+        not be modified; copy it first if you need to. Changes made
+        inside other mutable values, eg. appending to a list, are
+        not tracked.
+    """
+    track = self.__tracking()
+    rtn = track.cache
+    if rtn is None:
+      self.__load_all()
+      rtn = {}
+      for k, value in self.__dict__.items():
+        if isinstance(value, Dynamic):
+          value.__link(self, k)
+          value = Dynamic.to_dict(value)
+        rtn[k] = value
+      track.cache = rtn
+    return rtn
+
+  def __tracking(self):
+    """ Return the caches and links of this node, creating them if required """
+    track = self.__track
+    if track is None:
+      track = _Track()
+      object.__setattr__(self, "_Dynamic__track", track)
+    return track
+
+  def __link(self, parent, key):
+    """ Record that this node is held by parent[key], so changes reach the parent.
+
+        Links are only made when a parent builds a cached dictionary
+        or snapshot (or records a journal), so objects which never do
+        pay nothing for them.
+    """
+    if isinstance(self, FrozenDynamic):
+      return
+    track = self.__tracking()
+    link = (weakref.ref(parent), key)
+    if track.parents is None:
+      track.parents = [link]
+    elif link not in track.parents:
+      track.parents.append(link)
+
+  def __changed(self, key, value):
+    """ Discard cached dictionaries and record the change """
+    self.__invalidate()
+    if self.__track.journaled:
+      if isinstance(value, Dynamic) and not isinstance(value, FrozenDynamic):
+        value.__link(self, key)
+        value.__follow()
+      self.__record(("set", (key,), _plain(value)))
+
+  def __follow(self):
+    """ Mark this node and every nested Dynamic as journaled, linking each to its parent """
+    self.__tracking().journaled = True
+    for k, value in self.__dict__.items():
+      if isinstance(value, Dynamic) and not isinstance(value, FrozenDynamic):
+        value.__link(self, k)
+        if not value.__track.journaled:
+          value.__follow()
+
+  def __unfollow(self):
+    """ Clear the journaled mark below a node which stopped journaling, unless another journal covers it """
+    track = self.__track
+    if track.journal is not None or self.__journaled_parents():
+      return
+    track.journaled = False
+    for value in self.__dict__.values():
+      if isinstance(value, Dynamic) and value.__track is not None and value.__track.journaled:
+        value.__unfollow()
+
+  def __journaled_parents(self):
+    """ Return the (parent, key) pairs currently holding this node, which are journaled """
+    rtn = []
+    for ref, key in self.__track.parents or ():
+      parent = ref()
+      if parent is not None and parent.__dict__.get(key) is self and parent.__track.journaled:
+        rtn.append((parent, key))
+    return rtn
+
+  def __record(self, change):
+    """ Add a change to the journal of this node and every journaled parent """
+    track = self.__track
+    if track.journal is not None:
+      track.journal.append(change)
+    for parent, key in self.__journaled_parents():
+      parent.__record((change[0], (key,) + change[1]) + change[2:])
+
+  def __invalidate(self):
+    """ Discard the cached dictionary and snapshot of this node and its parents.
+
+        Building a node's dictionary or snapshot builds (and links)
+        every nested one, so if a node has neither, neither do its
+        parents.
+    """
+    track = self.__track
+    if track.cache is not None or track.frozen is not None:
+      track.cache = None
+      track.frozen = None
+      for ref, _ in track.parents or ():
+        parent = ref()
+        if parent is not None:
+          parent.__invalidate()
+
+  def __load(self, key):
+    """ Wrap and cache a value from the lazy source """
+    value = self.__source[key]
+    if isinstance(value, dict):
+      value = Dynamic(value, True)
+      track = self.__track
+      if track is not None and track.journaled:
+        value.__link(self, key)
+        value.__follow()
+    return self.__dict__.setdefault(key, value)
+
+  def __load_all(self):
+    """ Wrap every remaining value from the lazy source """
+    source = self.__source
+    if source is not None:
+      for key in _keys(source):
+        if key not in self.__dict__:
+          self.__load(key)
+      object.__setattr__(self, "_Dynamic__source", None)
+
+
+class FrozenDynamic(Dynamic):
+  """ Immutable, hashable Dynamic.
+
+      Create one from a dictionary or Dynamic, or using freeze():
+
+      config = Dynamic(d).freeze()
+      value = config.x.y
+
+      Unlike Dynamic, reading a missing key never creates it; it
+      raises AttributeError (or KeyError for config["x"]), and any
+      attempt to change the object raises TypeError. Nested dicts
+      are converted to FrozenDynamic, lists to tuples and sets to
+      frozensets, and keys are interned.
+
+      Since nothing can change it, a FrozenDynamic can be shared
+      between threads without any locking. To update one, replace()
+      returns a new version, which shares every unchanged branch:
+
+      config = config.replace("db.host", "localhost")
+  """
+
+  __slots__ = ("_FrozenDynamic__hash",)
+
+  def __init__(self, src=None):
+    Dynamic.__init__(self)
+    object.__setattr__(self, "_FrozenDynamic__hash", None)
+    if src is not None:
+      values = {}
+      for k in _keys(src):
+        if isinstance(k, str):
+          k = _intern(k)
+        values[k] = _frozen(src[k])
+      self.__dict__.update(values)
+
+  def __getattr__(self, key):
+    raise AttributeError(key)
+
+  def __getitem__(self, key):
+    try:
+      return self.__dict__[key]
+    except KeyError:
+      raise KeyError(key)
+
+  def __setattr__(self, key, value):
+    raise TypeError("FrozenDynamic does not support assignment")
+
+  __setitem__ = __setattr__
+
+  def __delattr__(self, key):
+    raise TypeError("FrozenDynamic does not support deletion")
+
+  __delitem__ = __delattr__
+
+  def __hash__(self):
+    rtn = self.__hash
+    if rtn is None:
+      rtn = hash(frozenset(self.__dict__.items()))
+      object.__setattr__(self, "_FrozenDynamic__hash", rtn)
+    return rtn
+
+  def __eq__(self, other):
+    return isinstance(other, FrozenDynamic) and self.__dict__ == other.__dict__
+
+  def __ne__(self, other):
+    return not self == other
+
+  def freeze(self):
+    return self
+
+  def snapshot(self):
+    return self
+
+  def __reduce__(self):
+    return FrozenDynamic, (Dynamic.to_dict(self),)
+
+  def replace(self, path, value):
+    """ Return a copy with the value at a dotted path replaced.
+
+        Only the nodes along the path are copied, and missing keys
+        along it are created; the original is unchanged.
+    """
+    return self.__replace(path.split("."), 0, _frozen(value))
+
+  def __replace(self, keys, offset, value):
+    """ Return a copy of this node with keys[offset:] replaced """
+    key = keys[offset]
+    if offset + 1 < len(keys):
+      child = self.__dict__.get(key)
+      if not isinstance(child, FrozenDynamic):
+        child = _empty
+      value = child.__replace(keys, offset + 1, value)
+    if isinstance(key, str):
+      key = _intern(key)
+    values = dict(self.__dict__)
+    values[key] = value
+    return _frozen_from(values)
+
+
+class _Track(object):
+  """ Cached conversions, parent links and journal of a Dynamic.
+
+      Created the first time a Dynamic needs one, so that building
+      and changing plain Dynamics costs nothing extra.
+  """
+
+  __slots__ = ("cache", "frozen", "parents", "journal", "journaled")
+
+  def __init__(self):
+    self.cache = None
+    self.frozen = None
+    self.parents = None
+    self.journal = None
+    self.journaled = False  # <-- This node or a parent records a journal
+
+
+class _JsonStream(object):
+  """ Incremental reader for Dynamic.from_json_stream() """
+
+  def __init__(self, fileobj, chunk_size):
+    self.__fileobj = fileobj
+    self.__chunk_size = chunk_size
+    self.__text = codecs.getincrementaldecoder("utf-8")()
+    self.__buffer = ""
+    self.__offset = 0
+    self.__eof = False
+
+  def __iter__(self):
+    c = self.__peek()
+    if c is None:
+      return
+    if c != "[":
+      yield self.__value()
+    else:
+      self.__offset += 1
+      if self.__peek() == "]":
+        self.__offset += 1
+      else:
+        while True:
+          yield self.__value()
+          c = self.__peek()
+          self.__offset += 1
+          if c == "]":
+            break
+          if c != ",":
+            raise ValueError("Expecting ',' or ']' in JSON array, found %r" % c)
+    if self.__peek() is not None:
+      raise ValueError("Extra data after JSON document")
+
+  def __peek(self):
+    """ Skip whitespace and return the next character, or None at the end """
+    while True:
+      buffer = self.__buffer
+      offset = self.__offset
+      while offset < len(buffer) and buffer[offset] in " \t\r\n":
+        offset += 1
+      self.__offset = offset
+      if offset < len(buffer):
+        return buffer[offset]
+      if self.__eof:
+        return None
+      self.__read()
+
+  def __value(self):
+    """ Decode the next value, reading more as required """
+    self.__peek()
+    while True:
+      buffer = self.__buffer
+      try:
+        value, end = _decoder.raw_decode(buffer, self.__offset)
+        # A number at the end of the buffer may continue in the next chunk
+        if self.__eof or (end < len(buffer) and buffer[end] not in ".eE+-"):
+          self.__offset = end
+          return _unwrap(value) if isinstance(value, list) else value
+      except ValueError:
+        if self.__eof:
+          raise
+      self.__read()
+
+  def __read(self):
+    """ Append the next chunk to the buffer, discarding what has been read """
+    size = max(self.__chunk_size, len(self.__buffer) - self.__offset)
+    chunk = self.__fileobj.read(size)
+    self.__eof = not chunk
+    if isinstance(chunk, bytes) and bytes is not str:
+      chunk = self.__text.decode(chunk, self.__eof)
+    self.__buffer = self.__buffer[self.__offset:] + chunk
+    self.__offset = 0
+
+
+def _lookup(node, keys, default):
+  """ Return the value at a path for Dynamic.path() accessors, without vivifying """
+  for key in keys:
+    if isinstance(node, Dynamic):
+      if key not in node:
+        return default
+      node = node[key]
+    elif isinstance(node, dict):
+      node = node.get(key, _missing)
+      if node is _missing:
+        return default
+    else:
+      node = getattr(node, key, _missing)
+      if node is _missing:
+        return default
+  return node
+
+
+def _chain(keys):
+  """ Return the nested __dict__ lookups for a path, for compiled accessors """
+  return "".join(".__dict__[%r]" % key for key in keys)
+
+
+def _from_pairs(pairs):
+  """ Build a Dynamic from the key value pairs of a parsed JSON object.
+
+      As in Dynamic(), objects inside lists are kept as dicts.
+  """
+  rtn = Dynamic()
+  for k, value in pairs:
+    if isinstance(value, list):
+      value = _unwrap(value)
+    rtn[k] = value
+  return rtn
+
+
+def _unwrap(value):
+  """ Return a value built by _from_pairs() with every object as a dict """
+  if isinstance(value, Dynamic):
+    return dict((k, _unwrap(v)) for k, v in value.__dict__.items())
+  if isinstance(value, list):
+    return [_unwrap(item) for item in value]
+  return value
+
+
+def _keys(src):
+  """ Return the keys of a dict, or of a Dynamic even if it has a "keys" key """
+  if isinstance(src, Dynamic):
+    return Dynamic.keys(src)
+  return src.keys()
+
+
+def _plain(value):
+  """ Return a Dynamic as a dict, and any other value unchanged """
+  if isinstance(value, Dynamic):
+    return Dynamic.to_dict(value)
+  return value
+
+
+def _diff(a, b, prefix, patch):
+  """ Add the changes which turn dict a into dict b to a patch """
+  if a is b:
+    return
+  for key in b:
+    value = b[key]
+    path = prefix + (key,)
+    if key not in a:
+      patch.append(("set", path, value))
+      continue
+    old = a[key]
+    if old is value:
+      continue
+    if isinstance(old, dict) and isinstance(value, dict):
+      _diff(old, value, path, patch)
+    elif type(old) is not type(value) or old != value:
+      patch.append(("set", path, value))
+  for key in a:
+    if key not in b:
+      patch.append(("delete", prefix + (key,)))
+
+
+def _restore(values):
+  """ Unpickle a Dynamic, wrapping its dictionary lazily """
+  return Dynamic(values, True)
+
+
+def _codec(name):
+  """ Return the (encode, decode) functions for a to_bytes() codec """
+  if name == "marshal":
+    return marshal.dumps, marshal.loads
+  if name == "msgpack":
+    import msgpack
+    return (lambda value: msgpack.packb(value, use_bin_type=True)), (lambda data: msgpack.unpackb(data, raw=False))
+  raise ValueError("Unknown codec '%s'; expected 'marshal' or 'msgpack'" % name)
+
+
+def _frozen_from(values):
+  """ Return a FrozenDynamic holding some already frozen values """
+  rtn = FrozenDynamic()
+  rtn.__dict__.update(values)
+  return rtn
+
+
+def _frozen(value):
+  """ Return an immutable copy of a value for FrozenDynamic """
+  if isinstance(value, FrozenDynamic):
+    return value
+  if isinstance(value, (dict, Dynamic)):
+    return FrozenDynamic(value)
+  if isinstance(value, (list, tuple)):
+    return tuple(_frozen(i) for i in value)
+  if isinstance(value, set):
+    return frozenset(_frozen(i) for i in value)
+  return value
+
+
+# Method names, which lazy Dynamics load eagerly so that keys hide them consistently
+_reserved = frozenset(name for name in dir(FrozenDynamic) if name[:1] != "_")
+
+# Shared empty FrozenDynamic
+_empty = FrozenDynamic()
+
+# Template for Dynamic.path() accessors; CHAIN is the nested key lookups
+_COMPILED_PATH = """
+def accessor(record, default=None):
+  try:
+    return recordCHAIN
+  except (KeyError, AttributeError):
+    return lookup(record, keys, default)
+"""
+
+# Template for Dynamic.extract(); VALUES and FALLBACK read every path
+_COMPILED_EXTRACT = """
+def extract(records, default):
+  for record in records:
+    try:
+      values = (VALUES)
+    except (KeyError, AttributeError):
+      values = (FALLBACK)
+    yield values
+"""
+
+# Compiled Dynamic.path() accessors, by path
+_paths = {}
+
+# Number of accessors held in _paths before it is emptied
+_MAX_PATHS = 1000
+
+# Marks a missing value
+_missing = object()
+
+# Guards compiling accessors
+_lock = threading.RLock()
+
+# Decodes JSON objects directly into Dynamics
+_decoder = json.JSONDecoder(object_pairs_hook=_from_pairs)
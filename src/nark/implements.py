@@ -1,5 +1,14 @@
+from __future__ import absolute_import
+from .enum import enum
+import threading
+import importlib
 import inspect
-import sys
+import pkgutil
+import weakref
+
+
+# When @implements checks that a class provides its interfaces
+ImplementsMode = enum("EAGER", "DEFERRED", "DISABLED")
 
 
 class ImplementsException(Exception):
@@ -9,42 +18,164 @@ class ImplementsException(Exception):
 
 
 def implements(*T):
+  """ Decorate a class as implementing the given interfaces.
+
+      The class is recorded in a global index, so that it can be
+      found using implementations() or scan().
+  """
   def inner(cls):
     cls.__implements = []
     for t in T:
-
-      # Look for required methods
-      t_methods = inspect.getmembers(t, predicate=lambda x: inspect.isfunction(x) or inspect.ismethod(x))
-      c_methods = inspect.getmembers(cls, predicate=lambda x: inspect.isfunction(x) or inspect.ismethod(x))
-      sig = {}
-      for i in t_methods:
-        name = i[0]
-        if name[:2] != "__":
-          sig[name] = False
-      for i in c_methods:
-        name = i[0]
-        if name in sig.keys():
-          sig[name] = True
-      missing = False
-
-      # Look for required properties
-      t_props = [i for i in inspect.getmembers(t) if i not in t_methods]
-      c_props = [i for i in inspect.getmembers(cls) if i not in c_methods]
-      for i in t_props:
-        name = i[0]
-        if name[:2] != "__":
-          sig[name] = False
-      for i in c_props:
-        name = i[0]
-        if name in sig.keys():
-          sig[name] = True
-      missing = False
-
-      for i in sig.keys():
-        if not sig[i]:
-          missing = True
-      if missing:
-        raise ImplementsException("Invalid @implements decorator on '%s': %r" % (t.__name__, sig), sig)
       cls.__implements.append(t)
+    if _mode == ImplementsMode.EAGER:
+      _check(cls, T)
+    elif _mode == ImplementsMode.DEFERRED:
+      _pending[cls] = T
+    with _lock:
+      _interfaces[cls] = tuple(T)
+      _provided.clear()
+      ref = weakref.ref(cls)
+      _classes.append(ref)
+      for t in T:
+        _implementations.setdefault(t, []).append(ref)
     return cls
   return inner
+
+
+def interfaces(cls):
+  """ Return the interfaces a class was decorated with """
+  return _interfaces[cls]
+
+
+def provides(obj, T):
+  """ True if an object (or class) implements the interface T.
+
+      Interfaces are inherited: a class provides every interface of
+      its base classes, and every base class of those interfaces.
+
+      The interfaces of each class are worked out once and cached as
+      a frozenset, so after the first check for a class, this is a
+      single dict lookup and set membership test.
+  """
+  cls = obj if inspect.isclass(obj) else obj.__class__
+  try:
+    return T in _provided[cls]
+  except KeyError:
+    pass
+  provided = set()
+  for base in inspect.getmro(cls):
+    for t in _interfaces.get(base, ()):
+      provided.update(i for i in inspect.getmro(t) if i is not object)
+  with _lock:
+    _provided[cls] = frozenset(provided)
+  return T in provided
+
+
+def implementations(T):
+  """ Return every class decorated as implementing T, oldest first """
+  with _lock:
+    refs = list(_implementations.get(T, ()))
+  return [cls for cls in (r() for r in refs) if cls is not None]
+
+
+def scan(package):
+  """ Return every @implements class defined in a package.
+
+      The package (a module or its name) and all of its submodules
+      are imported, and the classes defined in them are returned
+      in the order they were decorated. The result is cached, so
+      only the first scan of each package imports anything.
+  """
+  if not hasattr(package, "__name__"):
+    package = importlib.import_module(package)
+  name = package.__name__
+  with _lock:
+    if name in _scanned:
+      return list(_scanned[name])
+  if hasattr(package, "__path__"):
+    for _, module, _ in pkgutil.walk_packages(package.__path__, name + "."):
+      importlib.import_module(module)
+  prefix = name + "."
+  with _lock:
+    _classes[:] = [r for r in _classes if r() is not None]
+    found = [r() for r in _classes]
+    found = [cls for cls in found if cls.__module__ == name or cls.__module__.startswith(prefix)]
+    _scanned[name] = found
+  return list(found)
+
+
+def implements_mode(mode):
+  """ Set when @implements checks classes, and return the old mode.
+
+      ImplementsMode.EAGER (the default) checks every class when it
+      is decorated, and raises ImplementsException immediately.
+
+      ImplementsMode.DEFERRED only checks a class when validate() is
+      first invoked on it, which Scope.register() does; this keeps
+      import time down when most implementations are never bound.
+
+      ImplementsMode.DISABLED never checks classes at all.
+  """
+  global _mode
+  previous = _mode
+  _mode = mode
+  return previous
+
+
+def validate(cls):
+  """ Check a class decorated in DEFERRED mode, if it hasn't been yet """
+  try:
+    T = _pending.pop(cls)
+  except KeyError:
+    return
+  _check(cls, T)
+
+
+def _check(cls, T):
+  """ Raise ImplementsException if cls is missing members of any T """
+  names = set(dir(cls))
+  for t in T:
+    sig = {}
+    for name in _required(t):
+      sig[name] = name in names
+    if not all(sig.values()):
+      raise ImplementsException("Invalid @implements decorator on '%s': %r" % (t.__name__, sig), sig)
+
+
+def _required(t):
+  """ Return the public members required by an interface, cached per interface """
+  try:
+    return _signatures[t]
+  except KeyError:
+    pass
+  required = tuple(name for name in dir(t) if name[:2] != "__")
+  _signatures[t] = required
+  return required
+
+
+# Current checking mode, see implements_mode()
+_mode = ImplementsMode.EAGER
+
+# Required member names for each interface
+_signatures = weakref.WeakKeyDictionary()
+
+# Interfaces of classes waiting for a DEFERRED check
+_pending = weakref.WeakKeyDictionary()
+
+# Interfaces for each decorated class
+_interfaces = weakref.WeakKeyDictionary()
+
+# Decorated classes for each interface, oldest first
+_implementations = weakref.WeakKeyDictionary()
+
+# All decorated classes, oldest first
+_classes = []
+
+# Interfaces provided by each class, see provides()
+_provided = weakref.WeakKeyDictionary()
+
+# Decorated classes found by scan(), by package name
+_scanned = {}
+
+# Guards the global index
+_lock = threading.RLock()
@@ -0,0 +1,116 @@
+# Copyright 2013 Douglas Linder
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+
+class Lazy(object):
+  """ Proxy which creates the real object on first use.
+
+      You use it like this:
+
+      service = Lazy(ExpensiveService)
+      service.call()  # <-- ExpensiveService() is invoked here
+
+      The factory is invoked at most once, on the first attribute
+      access (or any other use) of the proxy; after that every
+      operation is forwarded to the created object.
+
+      isinstance() checks are forwarded too, but 'type(proxy)' is
+      always Lazy, and 'proxy is instance' is never true.
+
+      Each proxy has its own lock, so creating one object never
+      blocks the first use of any other proxy.
+  """
+
+  __slots__ = ("_Lazy__factory", "_Lazy__instance", "_Lazy__lock")
+
+  def __init__(self, factory):
+    _factory.__set__(self, factory)
+    _lock.__set__(self, threading.Lock())
+
+  def __getattribute__(self, key):
+    try:
+      instance = _instance.__get__(self)
+    except AttributeError:
+      instance = _resolve(self)
+    return getattr(instance, key)
+
+  def __setattr__(self, key, value):
+    setattr(_resolve(self), key, value)
+
+  def __delattr__(self, key):
+    delattr(_resolve(self), key)
+
+  def __call__(self, *args, **kwargs):
+    return _resolve(self)(*args, **kwargs)
+
+  def __getitem__(self, key):
+    return _resolve(self)[key]
+
+  def __setitem__(self, key, value):
+    _resolve(self)[key] = value
+
+  def __delitem__(self, key):
+    del _resolve(self)[key]
+
+  def __contains__(self, key):
+    return key in _resolve(self)
+
+  def __iter__(self):
+    return iter(_resolve(self))
+
+  def __len__(self):
+    return len(_resolve(self))
+
+  def __bool__(self):
+    return bool(_resolve(self))
+
+  __nonzero__ = __bool__  # python 2
+
+  def __eq__(self, other):
+    return _resolve(self) == other
+
+  def __ne__(self, other):
+    return _resolve(self) != other
+
+  def __hash__(self):
+    return hash(_resolve(self))
+
+  def __str__(self):
+    return str(_resolve(self))
+
+  def __repr__(self):
+    return repr(_resolve(self))
+
+
+def _resolve(proxy):
+  """ Return the real object for a proxy, creating it if required """
+  try:
+    return _instance.__get__(proxy)
+  except AttributeError:
+    pass
+  with _lock.__get__(proxy):
+    try:
+      return _instance.__get__(proxy)
+    except AttributeError:
+      instance = _factory.__get__(proxy)()
+      _instance.__set__(proxy, instance)
+      _factory.__set__(proxy, None)
+      return instance
+
+
+# Slot accessors, since attribute access on a proxy is forwarded
+_factory = Lazy._Lazy__factory
+_instance = Lazy._Lazy__instance
+_lock = Lazy._Lazy__lock
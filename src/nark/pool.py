@@ -0,0 +1,108 @@
+# Copyright 2013 Douglas Linder
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+
+class PoolExhaustedException(Exception):
+  def __init__(self, size, timeout):
+    msg = "No instance available from pool of %d after %s seconds." % (size, timeout)
+    super(PoolExhaustedException, self).__init__(msg)
+    self.size = size
+    self.timeout = timeout
+
+
+class Pool(object):
+  """ Thread safe bounded pool of reusable instances.
+
+      You use it like this:
+
+      pool = Pool(Parser, 4)
+      parser = pool.checkout()
+      try:
+        parser.parse(data)
+      finally:
+        pool.checkin(parser)
+
+      At most 'size' instances are created by the factory; they are
+      only created when the pool is empty. When every instance is
+      checked out, checkout() waits up to 'timeout' seconds (forever
+      if None) for one to be checked in, and then raises a
+      PoolExhaustedException.
+
+      If 'overflow' is True, checkout() never waits; a new instance
+      is created instead, and discarded again when checked in, by
+      calling its close() method if it has one.
+  """
+
+  def __init__(self, factory, size, overflow=False, timeout=None):
+    self.__factory = factory
+    self.__size = size
+    self.__overflow = overflow
+    self.__timeout = timeout
+    self.__idle = []
+    self.__created = 0
+    self.__extra = set()
+    self.__cond = threading.Condition()
+
+  def checkout(self):
+    """ Return an idle instance, creating one if required """
+    with self.__cond:
+      deadline = None
+      while not self.__idle:
+        if self.__created < self.__size:
+          self.__created += 1
+          extra = False
+          break
+        if self.__overflow:
+          extra = True
+          break
+        if self.__timeout is not None:
+          if deadline is None:
+            deadline = time.time() + self.__timeout
+          remaining = deadline - time.time()
+          if remaining <= 0:
+            raise PoolExhaustedException(self.__size, self.__timeout)
+          self.__cond.wait(remaining)
+        else:
+          self.__cond.wait()
+      else:
+        return self.__idle.pop()
+    try:
+      instance = self.__factory()
+    except Exception:
+      if not extra:
+        with self.__cond:
+          self.__created -= 1
+          self.__cond.notify()
+      raise
+    if extra:
+      with self.__cond:
+        self.__extra.add(id(instance))
+    return instance
+
+  def checkin(self, instance):
+    """ Return a checked out instance to the pool """
+    with self.__cond:
+      if id(instance) not in self.__extra:
+        self.__idle.append(instance)
+        self.__cond.notify()
+        return
+      self.__extra.discard(id(instance))
+    close = getattr(instance, "close", None)
+    if close is not None:
+      close()
+
+  def __repr__(self):
+    return "<Pool(size=%d, created=%d, idle=%d, overflow=%d)" % (self.__size, self.__created, len(self.__idle), len(self.__extra))
@@ -1,9 +1,21 @@
 from __future__ import absolute_import
 from .exception import exception
+from .implements import validate, interfaces, scan
+from .logging import Logging
+from .lazy import Lazy
+from .pool import Pool, PoolExhaustedException
+import functools
 import threading
+import weakref
 import inspect
+import time
 import sys
 
+try:
+  import contextvars
+except ImportError:  # python 2
+  contextvars = None
+
 
 def resolve(scope):
   """ A decorator to perform IOC in python.
@@ -42,43 +54,220 @@ def resolve(scope):
         pass
   """
 
-  # create scope if this isn't one
-  if not isinstance(scope, Scope):
-    tmp = scope
-    scope = Scope()
-    for t in tmp:
-      scope.register(t)
+  scope = _as_scope(scope)
 
   def inner(cls):
     old_init = cls.__init__
-    spec = inspect.getargspec(old_init)
+    plan = injection_plan(old_init)
     def __init__(self, *args, **kwargs):
-      kwargs_new = {}
-      if spec.defaults is not None and len(spec.defaults) > 0:
-        for i in reversed(range(len(spec.defaults))):
-          offset = len(spec.defaults) - i - 1
-          value = spec.defaults[i]
-          key = spec.args[len(spec.args) - 1 - offset]
-          if key not in kwargs.keys():
-            if inspect.isclass(value):
-              I = scope.resolve(value)
-              kwargs_new[key] = I
-      for key in kwargs.keys():
-        if key not in kwargs_new.keys():
-          kwargs_new[key] = kwargs[key]
-      old_init(self, *args, **kwargs_new)
+      for key, T in plan:
+        if key not in kwargs:
+          kwargs[key] = scope.resolve(T)
+      old_init(self, *args, **kwargs)
+    __init__.__wrapped__ = old_init
+    __init__._nark_resolved = True
     cls.__init__ = __init__
     return cls
   return inner
 
 
+def inject(scope):
+  """ A decorator to perform IOC on a plain function.
+
+      You use it like this:
+
+      @inject(scope)
+      def handler(request, db=IDb, cache=ICache):
+        # On this line, db and cache are resolved instances.
+        pass
+
+      handler(request)
+
+      As with @resolve, the scope may be a Scope or an array of
+      types, and arguments which default to a class are resolved
+      from the scope unless they are passed in. Unlike @resolve,
+      arguments passed positionally are not resolved either.
+
+      The wrapper is generated once, at decoration time, with the
+      same signature as the function and one inlined check for each
+      injected argument, so a call only costs one extra function
+      call plus a resolve() for each argument not passed in.
+  """
+  scope = _as_scope(scope)
+
+  def inner(fn):
+    plan = injection_plan(fn)
+    if not plan:
+      return fn
+    spec = _argspec(fn)
+    injected = dict(plan)
+    namespace = {"_nark_fn" : fn, "_nark_resolve" : scope.resolve, "_nark_missing" : object()}
+    params = []
+    call = []
+    body = []
+    first = len(spec.args) - len(spec.defaults or ())
+    for i, key in enumerate(spec.args):
+      if key in injected:
+        namespace["_nark_T%d" % i] = injected[key]
+        params.append("%s=_nark_missing" % key)
+        body.append("  if %s is _nark_missing:" % key)
+        body.append("    %s = _nark_resolve(_nark_T%d)" % (key, i))
+      elif i >= first:
+        namespace["_nark_D%d" % i] = spec.defaults[i - first]
+        params.append("%s=_nark_D%d" % (key, i))
+      else:
+        params.append(key)
+      call.append(key)
+    if spec.varargs:
+      params.append("*" + spec.varargs)
+      call.append("*" + spec.varargs)
+    kwonly = getattr(spec, "kwonlyargs", None) or []
+    kwonly_defaults = getattr(spec, "kwonlydefaults", None) or {}
+    if kwonly and not spec.varargs:
+      params.append("*")
+    for i, key in enumerate(kwonly):
+      if key in injected:
+        namespace["_nark_KT%d" % i] = injected[key]
+        params.append("%s=_nark_missing" % key)
+        body.append("  if %s is _nark_missing:" % key)
+        body.append("    %s = _nark_resolve(_nark_KT%d)" % (key, i))
+      elif key in kwonly_defaults:
+        namespace["_nark_K%d" % i] = kwonly_defaults[key]
+        params.append("%s=_nark_K%d" % (key, i))
+      else:
+        params.append(key)
+      call.append("%s=%s" % (key, key))
+    varkw = getattr(spec, "varkw", None) or getattr(spec, "keywords", None)
+    if varkw:
+      params.append("**" + varkw)
+      call.append("**" + varkw)
+    lines = ["def wrapper(%s):" % ", ".join(params)] + body + ["  return _nark_fn(%s)" % ", ".join(call)]
+    code = compile("\n".join(lines), "<nark.resolve inject %s>" % fn.__name__, "exec")
+    exec(code, namespace)
+    wrapper = functools.wraps(fn)(namespace["wrapper"])
+    wrapper.__wrapped__ = fn
+    return wrapper
+  return inner
+
+
+def injection_plan(fn):
+  """ Return the injection plan for the given function.
+
+      The plan is a list of (name, T) pairs, one for each argument
+      (including keyword-only arguments) which has a class as its
+      default value.
+
+      This is computed once at decoration time so that the generated
+      wrapper only has to do dict lookups for each call.
+  """
+  spec = _argspec(fn)
+  plan = []
+  if spec.defaults:
+    first = len(spec.args) - len(spec.defaults)
+    for i, value in enumerate(spec.defaults):
+      if inspect.isclass(value):
+        plan.append((spec.args[first + i], value))
+  kwonly_defaults = getattr(spec, "kwonlydefaults", None) or {}
+  for key in getattr(spec, "kwonlyargs", None) or []:
+    if inspect.isclass(kwonly_defaults.get(key)):
+      plan.append((key, kwonly_defaults[key]))
+  return plan
+
+
+def _argspec(fn):
+  """ Return the argument spec for the given function in python 2/3 """
+  try:
+    return inspect.getfullargspec(fn)
+  except AttributeError:  # python 2
+    return inspect.getargspec(fn)
+
+
+def _unwrap(init):
+  """ Return the original __init__ behind any decorators, and True if one is @resolve """
+  decorated = False
+  while True:
+    decorated = decorated or getattr(init, "_nark_resolved", False)
+    wrapped = getattr(init, "__wrapped__", None)
+    if wrapped is None:
+      return init, decorated
+    init = wrapped
+
+
+def _as_scope(scope):
+  """ Return the given scope, or a new scope with the given types registered """
+  if isinstance(scope, Scope):
+    return scope
+  rtn = Scope()
+  for t in scope:
+    rtn.register(t)
+  return rtn
+
+
 class Scope(object):
   """ Handles scope binding in a more complex manner """
 
-  def __init__(self):
+  def __init__(self, parent=None, stats=False):
     self.__bindings = {}
+    self.__parent = parent
+    self.__stats = stats or (parent is not None and parent.__stats)
+    self.__children = weakref.WeakSet()
+    self.__flat = None
+    self.__resolvers = None
+    if parent is not None:
+      with _scope_lock:
+        parent.__children.add(self)
+
+  def child(self):
+    """ Return a new child scope which inherits from this one.
+
+        The child resolves every binding registered on this scope
+        (and its ancestors), sharing the same singleton instances,
+        but types registered on the child override the inherited
+        bindings for the child only:
+
+        tenant = scope.child()
+        tenant.register(TenantDb)
+
+        Lookups use a flattened cache of the inherited bindings,
+        which is rebuilt when register() is called on the child or
+        any of its ancestors. A child with no bindings of its own
+        simply shares its parent's cache, so creating one per
+        request is cheap.
+    """
+    return Scope(self)
 
-  def register(self, T, per_call=False, per_thread=False):
+  def stats(self):
+    """ Return resolution statistics for the bindings in this scope.
+
+        Statistics are only collected for bindings registered on a
+        scope created with Scope(stats=True) (or a child of one);
+        otherwise this is always empty, and resolving costs nothing
+        extra.
+
+        The result maps each bound type to a dict of:
+
+        resolves      - number of resolve requests
+        hits          - resolves answered with an existing singleton,
+                        per_thread or per_request instance
+        constructions - number of instances created
+        failures      - number of failed attempts to create one
+        time          - total seconds spent creating instances
+        max           - the slowest creation, in seconds
+        histogram     - [(seconds, count), ...] creation times, where
+                        count is those slower than the previous
+                        bucket and no slower than this one
+    """
+    flat = self.__flat
+    if flat is None:
+      flat = self.__flatten()
+    rtn = {}
+    for b in set(flat.values()):
+      if b.stats is not None:
+        rtn[b.type] = b.stats.summary()
+    return rtn
+
+  def register(self, T, per_call=False, per_thread=False, per_request=False, lazy=False,
+               pool=0, pool_overflow=False, pool_timeout=None, factory=None, ttl=None):
     """ Register a type.
 
         The type must be bound to some class interface, using:
@@ -87,6 +276,9 @@ class Scope(object):
         class Blah(object):
           pass
 
+        If @implements is in DEFERRED mode, the type is checked
+        against its interfaces here, and ImplementsException raised.
+
         The default behaviour is a single instance per scope
         which is returned for all injection requests.
 
@@ -105,22 +297,217 @@ class Scope(object):
 
         Which means that common threads can be used to share the
         same scope if required.
+
+        If 'per_request' is set to True, the behaviour is changed
+        to return a new instance per request; see request(). When
+        no request block is active, the instance is held by the
+        current thread (or asyncio task) and released when that
+        ends, so churning threads do not leak instances.
+
+        If 'lazy' is set to True, injection requests return a Lazy
+        proxy instead, and the instance is only resolved (using the
+        rules above) the first time the proxy is actually used.
+
+        If 'pool' is set to N > 0, instances are kept in a Pool of
+        at most N instances, and each request block checks out one
+        instance, which is returned to the pool (not closed) when
+        the block exits. Pooled bindings can only be resolved inside
+        a request block. When the pool is exhausted, resolving waits
+        'pool_timeout' seconds (forever if None) and then fails, or
+        if 'pool_overflow' is True, creates a temporary instance.
+
+        If 'ttl' is set to a number of seconds, a (default lifetime)
+        singleton is refreshed once it is that old: the next resolve
+        starts creating a new instance on a background thread, and
+        the old instance is returned until the new one is ready, so
+        expiry never blocks a caller.
+
+        If 'factory' is set to a coroutine function (python 3.7+),
+        instances are created by awaiting it instead of calling T,
+        and must be resolved using aresolve(); only the default and
+        per_call lifetimes apply to these bindings, and passing any
+        other option with a factory raises ValueError.
+    """
+    validate(T)
+    if factory is not None:
+      unsupported = [name for name, value in (("per_thread", per_thread), ("per_request", per_request),
+                     ("lazy", lazy), ("pool", pool), ("ttl", ttl)) if value]
+      if unsupported:
+        raise ValueError("Options not supported for factory bindings of '%s': %s" % (T.__name__, ", ".join(unsupported)))
+      from .async_ import AsyncBinding
+      b = AsyncBinding(T, factory, per_call, self)
+    else:
+      b = Binding(T, per_call=per_call, per_thread=per_thread, per_request=per_request, lazy=lazy,
+                  scope=self, pool=pool, pool_overflow=pool_overflow, pool_timeout=pool_timeout,
+                  stats=self.__stats, ttl=ttl)
+    with _scope_lock:
+      for i in interfaces(T):
+        self.__bindings[i] = b
+      self.__invalidate()
+
+  def autoregister(self, package, **options):
+    """ Register every @implements class defined in a package.
+
+        Use it like this:
+
+        import myapp.services
+        scope.autoregister(myapp.services)
+
+        The package (a module or its name) and its submodules are
+        imported and scanned the first time any scope autoregisters
+        it; later calls reuse the cached result. Any keyword options
+        are passed on to register(). Classes are registered in the
+        order they were defined, so if two implement the same
+        interface, the last one wins.
     """
-    b = Binding(T, per_call, per_thread)
-    for i in T.__dict__["__implements"]:
-      self.__bindings[i] = b
+    for T in scan(package):
+      self.register(T, **options)
+
+  def __contains__(self, T):
+    """ True if the given type has a binding in this scope """
+    flat = self.__flat
+    if flat is None:
+      flat = self.__flatten()
+    return T in flat
 
   def resolve(self, T):
     """ Resolve the given type into an instance """
-    if T not in self.__bindings.keys():
+    resolvers = self.__resolvers
+    if resolvers is not None:
+      resolver = resolvers.get(T)
+      if resolver is not None:
+        return resolver()
+    flat = self.__flat
+    if flat is None:
+      flat = self.__flatten()
+    try:
+      binding = flat[T]
+    except KeyError:
       raise ResolveFailedException(T)
-    return self.__bindings[T].resolve()
+    return binding.resolve()
+
+  def aresolve(self, T):
+    """ Return an awaitable which resolves the given type (python 3.7+).
+
+        Use it like this:
+
+        db = await scope.aresolve(IDb)
+
+        Bindings registered with an async factory are awaited, and
+        their own async dependencies are created concurrently; any
+        other binding is resolved as it would be by resolve().
+    """
+    from .async_ import aresolve
+    return aresolve(self, T)
+
+  def binding(self, T):
+    """ Return the binding for the given type """
+    flat = self.__flat
+    if flat is None:
+      flat = self.__flatten()
+    try:
+      return flat[T]
+    except KeyError:
+      raise ResolveFailedException(T)
+
+  def request(self):
+    """ Return a new request block for per_request bindings.
+
+        Use it like this:
+
+        with scope.request():
+          handle_request()
+
+        Every per_request (or pooled) binding resolved inside the
+        block returns the same instance; on exit the instances are
+        released: pooled instances go back to their pool, and
+        close() is invoked on any others which have it. Blocks nest,
+        and the innermost active block is always used.
+    """
+    return Request()
+
+  def warmup(self, max_workers=4):
+    """ Create every singleton binding in this scope up front.
+
+        Use this before taking traffic so that slow singletons
+        (connection setup, cache loads, etc.) are not created by
+        the first requests.
+
+        Bindings are created by up to 'max_workers' threads at once;
+        a binding is only created after the bindings it is injected
+        with, so independent chains of singletons are created
+        concurrently.
+
+        per_call, per_thread and per_request bindings are skipped,
+        and lazy singletons are created as if they were not lazy.
+
+        Raises ResolveFailedException if any binding fails, or if the
+        bindings depend on each other in a cycle.
+    """
+    flat = self.__flat
+    if flat is None:
+      flat = self.__flatten()
+    bindings = set(b for b in flat.values() if b.is_singleton())
+    graph = {}
+    for b in bindings:
+      graph[b] = set(flat[T] for T in b.dependencies() if flat.get(T) in bindings)
+    _Warmup(graph).run(max_workers)
+
+  def freeze(self):
+    """ Compile the bindings in this scope for faster resolution.
+
+        Call this once registration is finished. Every binding is
+        compiled into a generated resolver function with its
+        lifetime logic inlined (see Binding.compile()), and resolve()
+        then invokes it directly.
+
+        Calling register() on this scope or any of its ancestors
+        discards the compiled resolvers, so a frozen scope is never
+        out of date; call freeze() again to recompile it.
+    """
+    with _scope_lock:
+      flat = self.__flat
+      if flat is None:
+        flat = self.__flatten()
+      compiled = {}
+      resolvers = {}
+      for T, b in flat.items():
+        if b not in compiled:
+          compiled[b] = b.compile()
+        resolvers[T] = compiled[b]
+      self.__resolvers = resolvers
 
   def clear(self):
-    """ Clear all held instances, but not bindings """
+    """ Clear all held instances, but not bindings.
+
+        Only the bindings registered on this scope are cleared;
+        inherited bindings belong to the parent scope.
+    """
     for i in self.__bindings.keys():
       self.__bindings[i].clear()
 
+  def __flatten(self):
+    """ Rebuild and return the flattened binding cache """
+    with _scope_lock:
+      if self.__parent is None:
+        flat = self.__bindings
+      else:
+        flat = self.__parent.__flat
+        if flat is None:
+          flat = self.__parent.__flatten()
+        if self.__bindings:
+          flat = dict(flat)
+          flat.update(self.__bindings)
+      self.__flat = flat
+      return flat
+
+  def __invalidate(self):
+    """ Drop the cached bindings of this scope and all its descendants """
+    self.__flat = None
+    self.__resolvers = None
+    for child in list(self.__children):
+      child.__invalidate()
+
   def __repr__(self):
     display = {}
     for i in self.__bindings.keys():
@@ -129,46 +516,459 @@ class Scope(object):
 
 
 class Binding(object):
-  """ Binding of a single instance type """
+  """ Binding of a single instance type
+
+      If the binding belongs to a scope, the bound type is created
+      with any of its constructor arguments that default to a type
+      bound in that scope, resolved recursively, eg.
+
+      @implements(ICache)
+      class Cache(object):
+        def __init__(self, db=IDb):
+          pass
 
-  def __init__(self, T, per_call, per_thread):
+      is created with the IDb instance for the scope. The plan for
+      this is worked out once, when the binding is created.
+
+      Types decorated with @resolve already inject their own
+      arguments, and are simply created with no arguments.
+  """
+
+  def __init__(self, T, per_call=False, per_thread=False, per_request=False, lazy=False, scope=None,
+               pool=0, pool_overflow=False, pool_timeout=None, stats=False, ttl=None):
     self.__type = T
+    self.stats = BindingStats() if stats else None
     self.__per_call = per_call
     self.__per_thread = per_thread
+    self.__per_request = per_request
+    self.__lazy = lazy
+    self.__scope = scope
+    self.__pool = None
+    if pool > 0:
+      self.__pool = Pool(self.instance, pool, pool_overflow, pool_timeout)
     self.__instances = {}
+    self.__lock = threading.RLock()
+    init, decorated = _unwrap(T.__init__)
+    try:
+      plan = injection_plan(init)
+    except TypeError:  # builtin __init__, eg. object.__init__
+      plan = []
+    self.__dependencies = [I for _, I in plan]
+    self.__plan = plan if not decorated and scope is not None else []
+    self.__decorated = decorated
+    self.__ttl = ttl if self.is_singleton() else None
+    self.__expires = None
+    self.__refreshing = False
+
+  @property
+  def type(self):
+    """ The bound type """
+    return self.__type
+
+  def is_singleton(self):
+    """ True if a single instance is held for the whole scope """
+    return not (self.__per_call or self.__per_thread or self.__per_request or self.__pool)
+
+  def dependencies(self):
+    """ Return the interfaces the bound type is injected with """
+    return self.__dependencies
 
   def clear(self):
     """ Clear held instances """
-    self.__instances = {}
+    with self.__lock:
+      self.__instances.clear()
+      self.__expires = None
 
   def resolve(self):
     """ Resolve the given type into an instance """
+    if self.stats is not None:
+      self.stats.resolved()
+    if self.__lazy:
+      return Lazy(self.__resolve)
+    return self.__resolve()
+
+  def __resolve(self):
+    """ Resolve the given type into an instance, ignoring laziness """
     if self.__per_call:
       return self.instance()
+    elif self.__pool is not None:
+      return self.pooled()
+    elif self.__per_request:
+      return self.scoped()
+    elif self.__ttl is not None:
+      return self.refreshed()
     else:
       return self.singleton()
 
   def singleton(self):
-    """ Return a singleton instance for the given type """
+    """ Return a singleton instance for the given type
+
+        Creation is double-checked against a per-binding lock, so
+        concurrent first requests only ever construct one instance,
+        and once the instance exists no lock is taken at all.
+    """
     key = "main"
     if self.__per_thread:
       key = threading.current_thread().name
-    if key not in self.__instances.keys():
-      self.__instances[key] = self.instance()
-    return self.__instances[key]
+    try:
+      instance = self.__instances[key]
+    except KeyError:
+      pass
+    else:
+      if self.stats is not None:
+        self.stats.hit()
+      return instance
+    with self.__lock:
+      instances = self.__instances
+      if key not in instances:
+        instances[key] = self.instance()
+        if self.__ttl is not None:
+          self.__expires = _clock() + self.__ttl
+      elif self.stats is not None:
+        self.stats.hit()
+      return instances[key]
 
-  def instance(self):
-    """ Return a new instance for the given type """
+  def refreshed(self):
+    """ Return the singleton, starting a background refresh if it has expired """
+    instance = self.singleton()
+    expires = self.__expires
+    if expires is not None and _clock() >= expires:
+      with self.__lock:
+        if self.__refreshing:
+          return instance
+        self.__refreshing = True
+      refresh = threading.Thread(target=self.__refresh)
+      refresh.daemon = True
+      refresh.start()
+    return instance
+
+  def __refresh(self):
+    """ Replace the singleton with a new instance """
+    try:
+      instance = self.instance()
+      with self.__lock:
+        self.__instances["main"] = instance
+    except ResolveFailedException:
+      e = exception()
+      log.error("Failed to refresh %s, keeping the stale instance: %s" % (self.__type.__name__, e))
+    finally:
+      self.__expires = _clock() + self.__ttl
+      self.__refreshing = False
+
+  def scoped(self):
+    """ Return the instance for the given type in the active request """
+    request = _requests.get()
+    if request is None:
+      request = Request(True)
+      _requests.set(request)
+    instances = request.instances
+    try:
+      instance = instances[self]
+    except KeyError:
+      return instances.setdefault(self, self.instance())
+    if self.stats is not None:
+      self.stats.hit()
+    return instance
+
+  def pooled(self):
+    """ Return the instance checked out of the pool for the active request """
+    request = _requests.get()
+    if request is None or request.implicit:
+      raise ResolveFailedException(self.__type, "pooled bindings must be resolved in a request block")
+    instances = request.instances
     try:
-      rtn = self.__type()
-    except Exception:
+      return instances[self]
+    except KeyError:
+      pass
+    try:
+      instance = self.__pool.checkout()
+    except PoolExhaustedException:
       e = exception()
       raise ResolveFailedException(self.__type, e)
+    instances[self] = instance
+    return instance
+
+  def release(self, instance):
+    """ Release an instance at the end of a request.
+
+        Pooled instances are checked back in to the pool, and any
+        other instance has close() invoked on it if it has one.
+    """
+    if self.__pool is not None:
+      self.__pool.checkin(instance)
+      return
+    close = getattr(instance, "close", None)
+    if callable(close):
+      close()
+
+  def compile(self):
+    """ Return a generated function equivalent to resolve().
+
+        The lifetime checks made by resolve() are fixed when the
+        binding is created, so the generated function only contains
+        the code for this binding's lifetime; eg. for a singleton:
+
+        def resolve_Db():
+          try:
+            return instances["main"]
+          except KeyError:
+            return singleton()
+
+        Bindings with stats enabled are not compiled, and pooled,
+        per_request and ttl bindings return their bound method.
+    """
+    if self.stats is not None:
+      return self.resolve
+    resolver = self.__compile()
+    if self.__lazy:
+      namespace = {"Lazy" : Lazy, "target" : resolver}
+      exec(_COMPILED_LAZY, namespace)
+      resolver = namespace["resolve"]
+      resolver.__name__ = "resolve_%s" % self.__type.__name__
+    return resolver
+
+  def __compile(self):
+    """ Return a generated resolver, ignoring laziness """
+    if self.__per_call:
+      if self.__plan or self.__decorated:
+        return self.instance
+      template = _COMPILED_PER_CALL
+    elif self.__pool is not None:
+      return self.pooled
+    elif self.__per_request:
+      return self.scoped
+    elif self.__ttl is not None:
+      return self.refreshed
+    elif self.__per_thread:
+      template = _COMPILED_PER_THREAD
+    else:
+      template = _COMPILED_SINGLETON
+    namespace = {
+      "T" : self.__type,
+      "instances" : self.__instances,
+      "singleton" : self.singleton,
+      "current_thread" : threading.current_thread,
+      "exception" : exception,
+      "ResolveFailedException" : ResolveFailedException
+    }
+    exec(template, namespace)
+    resolver = namespace["resolve"]
+    resolver.__name__ = "resolve_%s" % self.__type.__name__
+    return resolver
+
+  def instance(self):
+    """ Return a new instance for the given type
+
+        Raises ResolveFailedException if creating the type needs an
+        instance of itself, directly or through its dependencies.
+    """
+    stack = _constructing.stack
+    if self in stack:
+      cycle = stack[stack.index(self):] + [self]
+      names = " -> ".join(b.type.__name__ for b in cycle)
+      raise ResolveFailedException(self.__type, "dependency cycle %s" % names)
+    stats = self.stats
+    if stats is not None:
+      started = _clock()
+    stack.append(self)
+    try:
+      kwargs = {}
+      scope = self.__scope
+      for key, I in self.__plan:
+        if I in scope:
+          kwargs[key] = scope.resolve(I)
+      try:
+        rtn = self.__type(**kwargs)
+      except Exception:
+        e = exception()
+        raise ResolveFailedException(self.__type, e)
+    except ResolveFailedException:
+      if stats is not None:
+        stats.failed()
+      raise
+    finally:
+      stack.pop()
+    if stats is not None:
+      stats.constructed(_clock() - started)
     return rtn
 
   def __repr__(self):
     count = len(self.__instances.keys())
-    return "<Binding(type=%s, per_call=%s, per_thread=%s, instances=%d)" % (self.__type.__name__, self.__per_call, self.__per_thread, count)
+    return "<Binding(type=%s, per_call=%s, per_thread=%s, per_request=%s, lazy=%s, instances=%d)" % (self.__type.__name__, self.__per_call, self.__per_thread, self.__per_request, self.__lazy, count)
+
+
+class BindingStats(object):
+  """ Resolution counters and creation times for a single binding """
+
+  BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, float("inf"))
+  """ Upper bounds of the creation time histogram buckets, in seconds """
+
+  def __init__(self):
+    self.resolves = 0
+    self.hits = 0
+    self.constructions = 0
+    self.failures = 0
+    self.time = 0.0
+    self.max = 0.0
+    self.histogram = [0] * len(self.BUCKETS)
+    self.__lock = threading.Lock()
+
+  def resolved(self):
+    with self.__lock:
+      self.resolves += 1
+
+  def hit(self):
+    with self.__lock:
+      self.hits += 1
+
+  def failed(self):
+    with self.__lock:
+      self.failures += 1
+
+  def constructed(self, elapsed):
+    with self.__lock:
+      self.constructions += 1
+      self.time += elapsed
+      if elapsed > self.max:
+        self.max = elapsed
+      for i, bound in enumerate(self.BUCKETS):
+        if elapsed <= bound:
+          self.histogram[i] += 1
+          break
+
+  def summary(self):
+    """ Return a copy of the current statistics as a dict """
+    with self.__lock:
+      return {
+        "resolves" : self.resolves,
+        "hits" : self.hits,
+        "constructions" : self.constructions,
+        "failures" : self.failures,
+        "time" : self.time,
+        "max" : self.max,
+        "histogram" : list(zip(self.BUCKETS, self.histogram))
+      }
+
+
+class _Warmup(object):
+  """ Creates singleton bindings on worker threads, dependencies first """
+
+  def __init__(self, graph):
+    self.__graph = graph
+    self.__waiting = {}
+    self.__dependents = dict((b, []) for b in graph)
+    for b, deps in graph.items():
+      self.__waiting[b] = len(deps)
+      for d in deps:
+        self.__dependents[d].append(b)
+    self.__ready = [b for b in graph if self.__waiting[b] == 0]
+    self.__remaining = len(graph)
+    self.__running = 0
+    self.__error = None
+    self.__cond = threading.Condition()
+
+  def run(self, max_workers):
+    """ Create every binding, raising the first failure """
+    count = max(1, min(max_workers, len(self.__graph)))
+    threads = [threading.Thread(target=self.__work) for _ in range(count)]
+    for t in threads:
+      t.start()
+    for t in threads:
+      t.join()
+    if self.__error is not None:
+      raise self.__error
+    if self.__remaining > 0:
+      stuck = [b for b in self.__graph if self.__waiting[b] > 0][0]
+      raise ResolveFailedException(stuck.type, "dependency cycle between singletons")
+
+  def __next(self):
+    """ Wait for a binding which is ready to create, or None when done """
+    with self.__cond:
+      while True:
+        if self.__error is not None or self.__remaining == 0:
+          return None
+        if self.__ready:
+          self.__running += 1
+          return self.__ready.pop()
+        if self.__running == 0:
+          return None
+        self.__cond.wait()
+
+  def __work(self):
+    while True:
+      b = self.__next()
+      if b is None:
+        return
+      error = None
+      try:
+        b.singleton()
+      except Exception:
+        error = exception()
+      with self.__cond:
+        self.__running -= 1
+        if error is not None:
+          if self.__error is None:
+            self.__error = error
+        else:
+          self.__remaining -= 1
+          for d in self.__dependents[b]:
+            self.__waiting[d] -= 1
+            if self.__waiting[d] == 0:
+              self.__ready.append(d)
+        self.__cond.notify_all()
+
+
+class Request(object):
+  """ Holds the per_request instances for a single request block.
+
+      An implicit request is the one created for a thread (or task)
+      which resolves a per_request binding outside of any block.
+  """
+
+  def __init__(self, implicit=False):
+    self.implicit = implicit
+    self.instances = {}
+    self.__previous = None
+
+  def __enter__(self):
+    self.__previous = _requests.get()
+    _requests.set(self)
+    return self
+
+  def __exit__(self, *args):
+    _requests.set(self.__previous)
+    self.__previous = None
+    self.dispose()
+
+  def dispose(self):
+    """ Release held instances; see Binding.release() """
+    instances = self.instances
+    self.instances = {}
+    for binding, instance in instances.items():
+      try:
+        binding.release(instance)
+      except Exception:
+        e = exception()
+        log.error("Failed to release request instance %r: %s" % (instance, e))
+
+
+class _Constructing(threading.local):
+  """ Bindings currently being created on this thread """
+
+  def __init__(self):
+    self.stack = []
+
+
+class _ThreadRequestVar(threading.local):
+  """ Thread local stand-in for a ContextVar when contextvars is missing """
+
+  value = None
+
+  def get(self):
+    return self.value
+
+  def set(self, value):
+    self.value = value
 
 
 class ResolveFailedException(Exception):
@@ -179,3 +979,52 @@ class ResolveFailedException(Exception):
       msg = "Failed to create type '%s' instance: %s." % (T, e)
     super(ResolveFailedException, self).__init__(msg)
     self.type = T
+
+
+# Templates for Binding.compile()
+_COMPILED_SINGLETON = compile("""
+def resolve():
+  try:
+    return instances["main"]
+  except KeyError:
+    return singleton()
+""", "<nark.resolve singleton>", "exec")
+
+_COMPILED_PER_THREAD = compile("""
+def resolve():
+  try:
+    return instances[current_thread().name]
+  except KeyError:
+    return singleton()
+""", "<nark.resolve per_thread>", "exec")
+
+_COMPILED_PER_CALL = compile("""
+def resolve():
+  try:
+    return T()
+  except Exception:
+    raise ResolveFailedException(T, exception())
+""", "<nark.resolve per_call>", "exec")
+
+_COMPILED_LAZY = compile("""
+def resolve():
+  return Lazy(target)
+""", "<nark.resolve lazy>", "exec")
+
+# Best available timer for creation times
+_clock = getattr(time, "perf_counter", time.time)
+
+# Guards registration and flattening for scope hierarchies
+_scope_lock = threading.RLock()
+
+# Bindings being created, for cycle detection
+_constructing = _Constructing()
+
+# Active request for the current context
+if contextvars is not None:
+  _requests = contextvars.ContextVar("nark.resolve.request", default=None)
+else:
+  _requests = _ThreadRequestVar()
+
+# Logging
+log = Logging.get()
@@ -0,0 +1,276 @@
+# Copyright 2013 Douglas Linder
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+from .dynamic import Dynamic
+import array
+
+
+class DynamicTable(object):
+  """ Column store for records which all have the same shape.
+
+      You use it like this:
+
+      table = DynamicTable(Dynamic.from_ndjson(fp))
+      for row in table:
+        print(row.user.name)
+
+      total = sum(table.column("order.total"))
+
+      Rather than one Dynamic per record, and one __dict__ for every
+      nested level of every record, the table keeps one column for
+      each leaf value; ints and floats are packed into arrays.
+
+      Rows are views which read (and write) the columns, and behave
+      like a Dynamic, except that missing keys are never created.
+      column() returns a NumPy array if NumPy is installed, and a
+      list otherwise; the array of an int or float column shares
+      memory with the table, so writes to either are seen by both.
+
+      Every record must have the same keys as the first one, or
+      append() raises ValueError.
+  """
+
+  def __init__(self, records=None):
+    self.__columns = {}
+    self.__shape = None
+    self.__length = 0
+    if records is not None:
+      self.extend(records)
+
+  def append(self, record):
+    """ Add a record (a Dynamic or dict) to the end of the table """
+    values = {}
+    _flatten(record, (), values)
+    columns = self.__columns
+    if self.__shape is None:
+      self.__shape = _shape(record)
+      for path in values:
+        columns[path] = _column(values[path])
+    else:
+      if len(values) != len(columns) or any(path not in columns for path in values):
+        raise ValueError("Record keys %r do not match table columns %r" % (_names(values), _names(columns)))
+      for path in values:
+        _append(columns, path, values[path])
+    self.__length += 1
+
+  def extend(self, records):
+    """ Add every record in an iterable to the end of the table """
+    for record in records:
+      self.append(record)
+
+  def columns(self):
+    """ Return the dotted path of every column """
+    return _names(self.__columns)
+
+  def column(self, path):
+    """ Return every value of a column, given its dotted path, in row order """
+    values = self.__columns[tuple(path.split("."))]
+    numpy = _numpy()
+    if numpy is None:
+      return list(values)
+    if values.__class__ is list:
+      return numpy.array(values)
+    return numpy.frombuffer(values, values.typecode)
+
+  def __len__(self):
+    return self.__length
+
+  def __getitem__(self, index):
+    if index < 0:
+      index += self.__length
+    if not 0 <= index < self.__length:
+      raise IndexError("DynamicTable index out of range")
+    return DynamicRow(self.__columns, self.__shape, (), index)
+
+  def __iter__(self):
+    columns = self.__columns
+    shape = self.__shape
+    for index in range(self.__length):
+      yield DynamicRow(columns, shape, (), index)
+
+
+class DynamicRow(object):
+  """ View of one row, or a nested level of one row, of a DynamicTable """
+
+  __slots__ = ("_DynamicRow__columns", "_DynamicRow__shape", "_DynamicRow__prefix", "_DynamicRow__index")
+
+  def __init__(self, columns, shape, prefix, index):
+    object.__setattr__(self, "_DynamicRow__columns", columns)
+    object.__setattr__(self, "_DynamicRow__shape", shape)
+    object.__setattr__(self, "_DynamicRow__prefix", prefix)
+    object.__setattr__(self, "_DynamicRow__index", index)
+
+  def __getattr__(self, key):
+    try:
+      return self.__read(key)
+    except KeyError:
+      raise AttributeError(key)
+
+  def __getitem__(self, key):
+    return self.__read(key)
+
+  def __setattr__(self, key, value):
+    try:
+      self.__write(key, value)
+    except KeyError:
+      raise AttributeError(key)
+
+  def __setitem__(self, key, value):
+    self.__write(key, value)
+
+  def __contains__(self, key):
+    return key in self.__shape
+
+  def __iter__(self):
+    for key in self.__shape:
+      yield key, self.__value(key)
+
+  def keys(self):
+    return self.__shape.keys()
+
+  def values(self):
+    return [self.__read(key) for key in self.__shape]
+
+  def get(self, path, default=None):
+    """ See Dynamic.get() """
+    return Dynamic.path(path)(self, default)
+
+  def to_dict(self):
+    """ Return a new dictionary of the row """
+    return dict((key, self.__value(key)) for key in self.__shape)
+
+  def __str__(self):
+    return str(self.to_dict())
+
+  def __read(self, key):
+    """ Return a leaf value, or the view of a nested level """
+    shape = self.__shape[key]
+    path = self.__prefix + (key,)
+    if shape is None:
+      return self.__columns[path][self.__index]
+    return DynamicRow(self.__columns, shape, path, self.__index)
+
+  def __value(self, key):
+    """ Return a leaf value, or a nested level as a dictionary """
+    value = self.__read(key)
+    if isinstance(value, DynamicRow):
+      return value.to_dict()
+    return value
+
+  def __write(self, key, value):
+    """ Replace a leaf value """
+    if self.__shape[key] is not None:
+      raise KeyError(key)
+    _store(self.__columns, self.__prefix + (key,), self.__index, value)
+
+
+def _flatten(record, prefix, values):
+  """ Collect the leaf values of a record by path """
+  for key in record.keys():
+    value = record[key]
+    path = prefix + (key,)
+    if isinstance(value, (dict, Dynamic)) and len(value.keys()) > 0:
+      _flatten(value, path, values)
+    else:
+      values[path] = value
+
+
+def _shape(record):
+  """ Return the nested keys of a record, with None for each leaf """
+  rtn = {}
+  for key in record.keys():
+    value = record[key]
+    if isinstance(value, (dict, Dynamic)) and len(value.keys()) > 0:
+      rtn[key] = _shape(value)
+    else:
+      rtn[key] = None
+  return rtn
+
+
+def _names(paths):
+  """ Return the dotted names of some paths """
+  return sorted(".".join(path) for path in paths)
+
+
+def _column(value):
+  """ Return a new column holding a value; packed if the value is an int or float """
+  typecode = _typecodes.get(type(value))
+  if typecode is not None:
+    try:
+      return array.array(typecode, [value])
+    except OverflowError:
+      pass
+  return [value]
+
+
+def _append(columns, path, value):
+  """ Append a value to a column, unpacking it if the value doesn't fit """
+  column = columns[path]
+  if column.__class__ is not list:
+    if type(value) is _types[column.typecode]:
+      try:
+        column.append(value)
+        return
+      except OverflowError:
+        pass
+      except BufferError:
+        # A column() array still shares the buffer; grow a copy instead
+        column = columns[path] = array.array(column.typecode, column)
+        column.append(value)
+        return
+    column = columns[path] = column.tolist()
+  column.append(value)
+
+
+def _store(columns, path, index, value):
+  """ Replace a value in a column, unpacking it if the value doesn't fit """
+  column = columns[path]
+  if column.__class__ is not list:
+    if type(value) is _types[column.typecode]:
+      try:
+        column[index] = value
+        return
+      except OverflowError:
+        pass
+    column = columns[path] = column.tolist()
+  column[index] = value
+
+
+def _numpy():
+  """ Return the numpy module, or None if it isn't installed """
+  global _numpy_module
+  if _numpy_module is False:
+    try:
+      import numpy
+      _numpy_module = numpy
+    except ImportError:
+      _numpy_module = None
+  return _numpy_module
+
+
+# Array typecode for 64 bit integers; 'q' is python 3.3+
+try:
+  array.array("q")
+  _INT = "q"
+except ValueError:
+  _INT = "l"
+
+# Array typecodes for packed column types
+_typecodes = {int: _INT, float: "d"}
+
+# Column types for each array typecode
+_types = {_INT: int, "d": float}
+
+# The numpy module, once imported; False before the first column()
+_numpy_module = False
@@ -0,0 +1,165 @@
+# Copyright 2013 Douglas Linder
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Dynamic benchmarks.
+
+    These are not tests; run them directly:
+
+    PYTHONPATH=. python tests/bench/dynamic_bench.py
+"""
+
+from __future__ import absolute_import
+import bootstrap
+import tracemalloc
+import pickle
+import timeit
+from nark import *
+
+
+ITERATIONS = 20
+
+
+def document(width=50, depth=3):
+  """ Return a nested dict with width ** depth leaves """
+  if depth == 0:
+    return "value"
+  return dict(("key%d" % i, document(width, depth - 1)) for i in range(width))
+
+
+def report(name, seconds, baseline=None):
+  per_call = seconds / ITERATIONS * 1e3
+  if baseline is None:
+    print("%-24s %8.3fs  %8.3fms/call" % (name, seconds, per_call))
+  else:
+    print("%-24s %8.3fs  %8.3fms/call  (%.2fx)" % (name, seconds, per_call, baseline / seconds))
+
+
+def bench_lazy():
+  src = document()
+
+  def read(d):
+    return (d.key1.key2.key3, d.key10.key20.key30, d.key49.key0.key7)
+
+  eager = timeit.timeit(lambda: read(Dynamic(src)), number=ITERATIONS)
+  lazy = timeit.timeit(lambda: read(Dynamic(src, lazy=True)), number=ITERATIONS)
+  report("eager, read 3 fields", eager)
+  report("lazy, read 3 fields", lazy, eager)
+
+
+def bench_to_dict():
+  d = Dynamic(document())
+
+  def change():
+    d.key1.key2.key3 = "changed"
+
+  d.to_dict()
+  rebuild = timeit.timeit(lambda: (change(), dict(iter(d))), number=ITERATIONS)
+  cached = timeit.timeit(lambda: (change(), d.to_dict()), number=ITERATIONS)
+  report("dict(iter()), 1 change", rebuild)
+  report("to_dict(), 1 change", cached, rebuild)
+
+
+def bench_snapshot():
+  d = Dynamic(document())
+
+  def change():
+    d.key1.key2.key3 = "changed"
+
+  d.snapshot()
+  copied = timeit.timeit(lambda: (change(), FrozenDynamic(d)), number=ITERATIONS)
+  snapshot = timeit.timeit(lambda: (change(), d.snapshot()), number=ITERATIONS)
+  report("full copy, 1 change", copied)
+  report("snapshot(), 1 change", snapshot, copied)
+
+
+def bench_pickle():
+  d = Dynamic(document(10, 4))
+  src = plain(d)
+  protocol = pickle.HIGHEST_PROTOCOL
+
+  def change():
+    src["key1"]["key2"]["key3"]["key4"] = "changed"
+    d.key1.key2.key3.key4 = "changed"
+
+  # The Dynamic is changed before each dump, so its cached to_dict() is
+  # rebuilt, and each loaded copy is read back into a dictionary.
+  dumps = timeit.timeit(lambda: (change(), pickle.dumps(src, protocol)), number=ITERATIONS)
+  dynamic_dumps = timeit.timeit(lambda: (change(), pickle.dumps(d, protocol)), number=ITERATIONS)
+  dumped = timeit.timeit(lambda: (change(), pickle.loads(pickle.dumps(src, protocol))), number=ITERATIONS)
+  pickled = timeit.timeit(lambda: (change(), pickle.loads(pickle.dumps(d, protocol)).to_dict()), number=ITERATIONS)
+  encoded = timeit.timeit(lambda: (change(), Dynamic.from_bytes(d.to_bytes()).to_dict()), number=ITERATIONS)
+  report("dumps dict", dumps)
+  report("dumps Dynamic, 1 change", dynamic_dumps, dumps)
+  report("pickle dict", dumped)
+  report("pickle Dynamic, 1 change", pickled, dumped)
+  report("marshal Dynamic, 1 change", encoded, dumped)
+  print("%-24s %8d bytes" % ("pickled dict", len(pickle.dumps(src, protocol))))
+  print("%-24s %8d bytes" % ("pickled Dynamic", len(pickle.dumps(d, protocol))))
+  print("%-24s %8d bytes" % ("marshalled Dynamic", len(d.to_bytes())))
+
+
+def plain(value):
+  """ Return a Dynamic as nested dicts, keeping its key objects """
+  if isinstance(value, Dynamic):
+    return dict((k, plain(v)) for k, v in value)
+  return value
+
+
+def bench_path():
+  records = [Dynamic(document(4, 3)) for _ in range(1000)]
+  paths = ["key1.key2.key3", "key0.key0.key0", "key3.missing.key1"]
+
+  def manual():
+    for record in records:
+      (record.get(paths[0]), record.get(paths[1]), record.get(paths[2]))
+
+  def extract():
+    for _ in Dynamic.extract(records, paths):
+      pass
+
+  manual_get = timeit.timeit(manual, number=ITERATIONS)
+  extracted = timeit.timeit(extract, number=ITERATIONS)
+  report("get(), 1 path missing", manual_get)
+  report("extract(), 1 path missing", extracted, manual_get)
+
+  paths[2] = "key3.key0.key1"
+  manual_get = timeit.timeit(manual, number=ITERATIONS)
+  extracted = timeit.timeit(extract, number=ITERATIONS)
+  report("get(), none missing", manual_get)
+  report("extract(), none missing", extracted, manual_get)
+
+
+def bench_table():
+  records = [{"id" : i, "score" : i * 0.5, "user" : {"name" : "user", "age" : i % 90}} for i in range(100000)]
+
+  def allocated(fn):
+    tracemalloc.start()
+    try:
+      value = fn()
+      return tracemalloc.get_traced_memory()[0], value
+    finally:
+      tracemalloc.stop()
+
+  dynamics, _ = allocated(lambda: [Dynamic(r) for r in records])
+  table, _ = allocated(lambda: DynamicTable(records))
+  print("%-24s %8.1fMB" % ("100k Dynamics", dynamics / 1e6))
+  print("%-24s %8.1fMB  (%.2fx)" % ("100k row DynamicTable", table / 1e6, float(dynamics) / table))
+
+
+if __name__ == "__main__":
+  bench_lazy()
+  bench_to_dict()
+  bench_snapshot()
+  bench_pickle()
+  bench_path()
+  bench_table()
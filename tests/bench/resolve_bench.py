@@ -0,0 +1,191 @@
+# Copyright 2013 Douglas Linder
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Resolver benchmarks.
+
+    These are not tests; run them directly:
+
+    PYTHONPATH=. python tests/bench/resolve_bench.py
+"""
+
+from __future__ import absolute_import
+import bootstrap
+import inspect
+import timeit
+from nark import *
+
+
+ITERATIONS = 100000
+
+
+class IPrinter(object):
+  def prints(self, msg):
+    pass
+
+
+class IValuer(object):
+  def value(self, a, b):
+    pass
+
+
+@implements(IPrinter)
+class Printer(object):
+  def prints(self, msg):
+    return msg
+
+
+@implements(IValuer)
+class Valuer(object):
+  def value(self, a, b):
+    return a + b
+
+
+def legacy_resolve(scope):
+  """ The original per-call argspec walking wrapper, for comparison """
+  def inner(cls):
+    old_init = cls.__init__
+    try:
+      spec = inspect.getfullargspec(old_init)
+    except AttributeError:
+      spec = inspect.getargspec(old_init)
+    def __init__(self, *args, **kwargs):
+      kwargs_new = {}
+      if spec.defaults is not None and len(spec.defaults) > 0:
+        for i in reversed(range(len(spec.defaults))):
+          offset = len(spec.defaults) - i - 1
+          value = spec.defaults[i]
+          key = spec.args[len(spec.args) - 1 - offset]
+          if key not in kwargs.keys():
+            if inspect.isclass(value):
+              I = scope.resolve(value)
+              kwargs_new[key] = I
+      for key in kwargs.keys():
+        if key not in kwargs_new.keys():
+          kwargs_new[key] = kwargs[key]
+      old_init(self, *args, **kwargs_new)
+    cls.__init__ = __init__
+    return cls
+  return inner
+
+
+def report(name, seconds, baseline=None):
+  per_call = seconds / ITERATIONS * 1e6
+  if baseline is None:
+    print("%-24s %8.3fs  %6.2fus/call" % (name, seconds, per_call))
+  else:
+    print("%-24s %8.3fs  %6.2fus/call  (%.2fx)" % (name, seconds, per_call, baseline / seconds))
+
+
+def bench_resolve():
+  scope = Scope()
+  scope.register(Printer)
+  scope.register(Valuer)
+
+  class Consumer(object):
+    def __init__(self, x, y=1, valuer=IValuer, name="name", printer=IPrinter):
+      self.valuer = valuer
+      self.printer = printer
+
+  Legacy = legacy_resolve(scope)(type("Legacy", (Consumer,), {}))
+  Planned = resolve(scope)(type("Planned", (Consumer,), {}))
+
+  legacy = timeit.timeit(lambda: Legacy(1), number=ITERATIONS)
+  planned = timeit.timeit(lambda: Planned(1), number=ITERATIONS)
+  report("legacy @resolve", legacy)
+  report("planned @resolve", planned, legacy)
+
+
+def bench_lazy():
+
+  class IService(object):
+    def call(self):
+      pass
+
+  @implements(IService)
+  class Service(object):
+    def __init__(self):
+      self.config = dict((str(i), i) for i in range(100))
+    def call(self):
+      return 1
+
+  eager = Scope()
+  eager.register(Service, per_call=True)
+  lazy = Scope()
+  lazy.register(Service, per_call=True, lazy=True)
+
+  class Consumer(object):
+    def __init__(self, service=IService):
+      self.service = service
+
+  Eager = resolve(eager)(type("Eager", (Consumer,), {}))
+  Deferred = resolve(lazy)(type("Deferred", (Consumer,), {}))
+
+  unused_eager = timeit.timeit(lambda: Eager(), number=ITERATIONS)
+  unused_lazy = timeit.timeit(lambda: Deferred(), number=ITERATIONS)
+  report("eager, unused", unused_eager)
+  report("lazy, unused", unused_lazy, unused_eager)
+
+  direct = Eager().service
+  proxy = Deferred().service
+  proxy.call()
+  direct_call = timeit.timeit(lambda: direct.call(), number=ITERATIONS)
+  proxy_call = timeit.timeit(lambda: proxy.call(), number=ITERATIONS)
+  report("direct call", direct_call)
+  report("lazy proxy call", proxy_call, direct_call)
+
+
+def bench_freeze():
+  dynamic = Scope()
+  dynamic.register(Printer)
+  dynamic.register(Valuer, per_call=True)
+  frozen = Scope()
+  frozen.register(Printer)
+  frozen.register(Valuer, per_call=True)
+  frozen.freeze()
+
+  singleton = timeit.timeit(lambda: dynamic.resolve(IPrinter), number=ITERATIONS)
+  frozen_singleton = timeit.timeit(lambda: frozen.resolve(IPrinter), number=ITERATIONS)
+  report("dynamic singleton", singleton)
+  report("frozen singleton", frozen_singleton, singleton)
+
+  per_call = timeit.timeit(lambda: dynamic.resolve(IValuer), number=ITERATIONS)
+  frozen_per_call = timeit.timeit(lambda: frozen.resolve(IValuer), number=ITERATIONS)
+  report("dynamic per_call", per_call)
+  report("frozen per_call", frozen_per_call, per_call)
+
+
+def bench_inject():
+  scope = Scope()
+  scope.register(Printer)
+  scope.register(Valuer)
+  scope.freeze()
+
+  def handler(msg, valuer=IValuer, printer=IPrinter):
+    return msg
+
+  def manual(msg):
+    return handler(msg, valuer=scope.resolve(IValuer), printer=scope.resolve(IPrinter))
+
+  injected = inject(scope)(handler)
+
+  manual_call = timeit.timeit(lambda: manual("msg"), number=ITERATIONS)
+  injected_call = timeit.timeit(lambda: injected("msg"), number=ITERATIONS)
+  report("manual resolve", manual_call)
+  report("@inject", injected_call, manual_call)
+
+
+if __name__ == "__main__":
+  bench_resolve()
+  bench_lazy()
+  bench_freeze()
+  bench_inject()
@@ -0,0 +1,199 @@
+# Copyright 2013 Douglas Linder
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Asyncio test cases, imported by async_tests on pythons which support them """
+
+from __future__ import absolute_import
+import unittest
+import asyncio
+import time
+import bootstrap
+from nark import *
+
+
+class IDb(object):
+  def data(self):
+    pass
+
+
+class ICache(object):
+  def get(self):
+    pass
+
+
+class IValuer(object):
+  def value(self, a, b):
+    pass
+
+
+class AsyncTests(unittest.TestCase):
+
+  def test_can_resolve_async_factory_with_dependencies(self):
+
+    @implements(IValuer)
+    class Valuer(object):
+      def value(self, a, b):
+        return a + b
+
+    @implements(IDb)
+    class Db(object):
+      def __init__(self, valuer):
+        self.valuer = valuer
+      def data(self):
+        return self.valuer.value(5, 5)
+
+    async def connect(valuer=IValuer):
+      await asyncio.sleep(0.01)
+      return Db(valuer)
+
+    scope = Scope()
+    scope.register(Valuer)
+    scope.register(Db, factory=connect)
+
+    a = Assert()
+
+    db = asyncio.run(scope.aresolve(IDb))
+    a.equals(db.data(), 10, "Failed to resolve async binding")
+    a.true(asyncio.run(scope.aresolve(IDb)) is db, "Async singleton wasn't shared")
+    a.not_null(asyncio.run(scope.aresolve(IValuer)), "Failed to aresolve sync binding")
+
+    failed = False
+    try:
+      scope.resolve(IDb)
+    except ResolveFailedException:
+      failed = True
+    a.true(failed, "Resolved async binding synchronously")
+
+  def test_concurrent_awaiters_share_one_creation(self):
+
+    created = []
+
+    @implements(IDb)
+    class Db(object):
+      def data(self):
+        return 10
+
+    async def connect():
+      created.append(1)
+      await asyncio.sleep(0.05)
+      return Db()
+
+    scope = Scope()
+    scope.register(Db, factory=connect)
+
+    async def run():
+      return await asyncio.gather(*[scope.aresolve(IDb) for _ in range(10)])
+
+    a = Assert()
+
+    results = asyncio.run(run())
+    a.equals(len(created), 1, "Async singleton was created more than once")
+    a.true(all(r is results[0] for r in results), "Awaiters got different instances")
+
+  def test_independent_dependencies_are_created_concurrently(self):
+
+    @implements(IDb)
+    class Db(object):
+      def data(self):
+        return 10
+
+    @implements(IValuer)
+    class Valuer(object):
+      def value(self, a, b):
+        return a + b
+
+    @implements(ICache)
+    class Cache(object):
+      def __init__(self, db, valuer):
+        self.db = db
+        self.valuer = valuer
+      def get(self):
+        return self.valuer.value(self.db.data(), 1)
+
+    async def connect():
+      await asyncio.sleep(0.2)
+      return Db()
+
+    async def valuer():
+      await asyncio.sleep(0.2)
+      return Valuer()
+
+    async def cache(db=IDb, valuer=IValuer):
+      return Cache(db, valuer)
+
+    scope = Scope()
+    scope.register(Db, factory=connect)
+    scope.register(Valuer, factory=valuer)
+    scope.register(Cache, factory=cache)
+
+    a = Assert()
+
+    started = time.time()
+    value = asyncio.run(scope.aresolve(ICache)).get()
+    elapsed = time.time() - started
+
+    a.equals(value, 11, "Failed to inject async dependencies")
+    a.true(elapsed < 0.35, "Dependencies were not created concurrently")
+
+  def test_async_dependency_cycles_fail(self):
+
+    @implements(IDb)
+    class Db(object):
+      def data(self):
+        return 10
+
+    @implements(ICache)
+    class Cache(object):
+      def get(self):
+        pass
+
+    async def connect(cache=ICache):
+      return Db()
+
+    async def cache(db=IDb):
+      return Cache()
+
+    scope = Scope()
+    scope.register(Db, factory=connect)
+    scope.register(Cache, factory=cache)
+
+    a = Assert()
+
+    failed = False
+    try:
+      asyncio.run(scope.aresolve(IDb))
+    except ResolveFailedException:
+      e = exception()
+      a.true("Db -> Cache -> Db" in str(e), "Didn't report the cycle")
+      failed = True
+    a.true(failed, "Resolved a dependency cycle")
+
+
+  def test_factory_rejects_unsupported_options(self):
+
+    @implements(IDb)
+    class Db(object):
+      def data(self):
+        return 10
+
+    async def connect():
+      return Db()
+
+    a = Assert()
+    for options in ({"per_thread" : True}, {"lazy" : True}, {"pool" : 2}, {"ttl" : 1}):
+      failed = False
+      try:
+        Scope().register(Db, factory=connect, **options)
+      except ValueError:
+        failed = True
+      a.true(failed, "Accepted factory with %r" % options)
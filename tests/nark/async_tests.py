@@ -0,0 +1,27 @@
+# Copyright 2013 Douglas Linder
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+""" Asyncio tests; skipped on pythons without async/await and asyncio.run() """
+
+from __future__ import absolute_import
+import unittest
+import sys
+import bootstrap
+
+if sys.version_info >= (3, 7):
+  from async_cases import AsyncTests
+
+
+if __name__ == "__main__":
+  unittest.main()
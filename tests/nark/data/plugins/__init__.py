@@ -0,0 +1,11 @@
+from nark import *
+
+
+class IGreeter(object):
+  def greet(self, name):
+    pass
+
+
+class IShouter(object):
+  def shout(self, name):
+    pass
@@ -0,0 +1,8 @@
+from nark import *
+from plugins import IGreeter
+
+
+@implements(IGreeter)
+class Greeter(object):
+  def greet(self, name):
+    return "hello " + name
@@ -0,0 +1,10 @@
+from nark import *
+from plugins import IShouter, IGreeter
+
+
+@implements(IShouter)
+class Shouter(object):
+  def __init__(self, greeter=IGreeter):
+    self.greeter = greeter
+  def shout(self, name):
+    return self.greeter.greet(name).upper()
@@ -12,8 +12,36 @@
 # limitations under the License.
 
 import unittest
+import pickle
+import copy
+import json
+import io
 import bootstrap
+import nark.dynamic
 from nark import *
+try:
+  import tracemalloc
+except ImportError:  # python 2
+  tracemalloc = None
+
+
+def record(i):
+  return {"id" : i, "tags" : ["a", "b"], "data" : {"x" : i, "y" : {"z" : "v" * 200}}}
+
+
+def peak(fn):
+  """ Return the peak memory allocated while running fn """
+  tracemalloc.start()
+  try:
+    fn()
+    return tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+
+
+def drain(records):
+  for _ in records:
+    pass
 
 
 class DynamicTests(unittest.TestCase):
@@ -126,6 +154,360 @@ class DynamicTests(unittest.TestCase):
     a.true(None == i.foo(), 'Call failed')
     a.true("{'foo': '{}', 'two': '2', 'one': 'one'}" == str(i), 'string mapping failed')
 
+  def test_lazy_dynamic_wraps_on_access(self):
+    a = Assert()
+    src = {"A" : "B", "E" : {"F" : {"G" : "H"}}, "X" : {"Y" : "Z"}}
+    i = Dynamic(src, lazy=True)
+
+    a.equals(i.A, "B", "Didn't read lazy value")
+    a.equals(i.E.F.G, "H", "Didn't read lazy child")
+    a.equals(i["X"]["Y"], "Z", "Didn't read lazy item")
+    a.true(i.E is i.E, "Didn't cache lazy child")
+    a.true("X" in i, "Couldn't find lazy key")
+
+    i.E.F.G = "I"
+    i.Q.R = "S"
+    a.equals(src["E"]["F"]["G"], "H", "Modified the source")
+
+    d = dict(iter(i))
+    a.equals(d["E"]["F"]["G"], "I", "Failed to convert to dict")
+    a.equals(d["X"]["Y"], "Z", "Failed to convert to dict")
+    a.equals(sorted(i.keys()), ["A", "E", "Q", "X"], "Missing keys")
+
+  def test_to_dict_rebuilds_only_changed_branches(self):
+    a = Assert()
+    i = Dynamic({"x" : {"y" : {"z" : 1}}, "w" : {"v" : 2}})
+
+    d1 = i.to_dict()
+    a.true(d1 is i.to_dict(), "Didn't cache dictionary")
+    a.equals(d1["x"]["y"]["z"], 1, "Didn't convert nested value")
+
+    i.x.y.z = 3
+    d2 = i.to_dict()
+    a.false(d1 is d2, "Didn't rebuild changed dictionary")
+    a.equals(d2["x"]["y"]["z"], 3, "Didn't rebuild changed value")
+    a.true(d1["w"] is d2["w"], "Rebuilt unchanged branch")
+
+    i.x.q = 4
+    a.equals(i.to_dict()["x"]["q"], 4, "Didn't track vivified branch")
+
+  def test_from_json_stream_reads_array_items(self):
+    a = Assert()
+    src = json.dumps([record(i) for i in range(20)] + [1.5e3, "x"]).encode("utf-8")
+
+    items = list(Dynamic.from_json_stream(io.BytesIO(src), chunk_size=7))
+    a.equals(len(items), 22, "Didn't read every item")
+    a.equals(items[3].data.y.z, "v" * 200, "Didn't read nested value")
+    a.equals(items[20], 1.5e3, "Didn't read number across chunks")
+
+    # Anything but a top-level array is read whole, and yielded once
+    items = list(Dynamic.from_json_stream(io.StringIO(u'{"x" : {"y" : [1, 2]}}'), chunk_size=3))
+    a.equals(len(items), 1, "Streamed items of a nested array")
+    a.equals(items[0].x.y, [1, 2], "Didn't read single document")
+
+  def test_from_ndjson_reads_lines(self):
+    a = Assert()
+    src = b"\n".join(json.dumps(record(i)).encode("utf-8") for i in range(20)) + b"\n\n"
+
+    items = list(Dynamic.from_ndjson(io.BytesIO(src)))
+    a.equals(len(items), 20, "Didn't read every line")
+    a.equals(items[19].data.x, 19, "Didn't read nested value")
+
+  def test_json_streams_match_dynamic_of_parsed_json(self):
+    a = Assert()
+    src = u'{"x" : [{"a" : {"b" : 1}}, [{"c" : 2}]], "y" : {"z" : [{"a" : 1}]}}'
+    expected = Dynamic(json.loads(src))
+
+    for read in (Dynamic.from_ndjson, Dynamic.from_json_stream):
+      i = list(read(io.StringIO(src)))[0]
+      a.equals(type(i.x[0]), dict, "Built a Dynamic inside a list")
+      a.equals(type(i.x[1][0]), dict, "Built a Dynamic inside a nested list")
+      a.equals(type(i.y), Dynamic, "Didn't build a nested Dynamic")
+      a.equals(i.to_dict(), expected.to_dict(), "Didn't match Dynamic(json.loads())")
+      a.equals(Dynamic.from_bytes(i.to_bytes()).to_dict(), expected.to_dict(), "Didn't round trip through to_bytes()")
+
+    items = list(Dynamic.from_json_stream(io.StringIO(u'[[{"a" : 1}]]')))
+    a.equals(type(items[0][0]), dict, "Built a Dynamic inside a streamed list")
+
+  def test_json_streams_hold_one_record_at_a_time(self):
+    if tracemalloc is None:
+      return
+    a = Assert()
+    records = [record(i) for i in range(2000)]
+    ndjson = b"\n".join(json.dumps(r).encode("utf-8") for r in records)
+    array = json.dumps(records).encode("utf-8")
+
+    single = peak(lambda: list(Dynamic.from_ndjson(io.BytesIO(json.dumps(records[0]).encode("utf-8")))))
+    streamed = peak(lambda: drain(Dynamic.from_ndjson(io.BytesIO(ndjson))))
+    a.true(streamed < single * 4, "NDJSON peak %d not close to one record %d" % (streamed, single))
+
+    streamed = peak(lambda: drain(Dynamic.from_json_stream(io.BytesIO(array), chunk_size=4096)))
+    a.true(streamed < single * 10, "JSON peak %d not close to one record %d" % (streamed, single))
+
+  def test_snapshot_shares_unchanged_branches(self):
+    a = Assert()
+    i = Dynamic({"x" : {"y" : {"z" : 1}}, "w" : {"v" : [1, 2]}})
+
+    s1 = i.snapshot()
+    a.true(s1 is i.snapshot(), "Didn't cache snapshot")
+    a.true(isinstance(s1, FrozenDynamic), "Didn't freeze snapshot")
+
+    i.x.y.z = 2
+    s2 = i.snapshot()
+    a.equals(s1.x.y.z, 1, "Changed previous snapshot")
+    a.equals(s2.x.y.z, 2, "Didn't snapshot change")
+    a.true(s1.w is s2.w, "Didn't share unchanged branch")
+    a.equals(s2.w.v, (1, 2), "Didn't freeze list")
+
+  def test_snapshot_allows_method_named_keys(self):
+    a = Assert()
+    i = Dynamic({"x" : {"snapshot" : 1, "freeze" : 2}})
+    a.equals(i.snapshot().x.snapshot, 1, "Didn't snapshot nested key")
+    a.equals(i.freeze().x.freeze, 2, "Didn't freeze nested key")
+
+  def test_frozen_replace_copies_path_only(self):
+    a = Assert()
+    f1 = FrozenDynamic({"x" : {"y" : {"z" : 1}}, "w" : {"v" : 1}})
+
+    f2 = f1.replace("x.y.z", 2)
+    a.equals(f1.x.y.z, 1, "Changed original")
+    a.equals(f2.x.y.z, 2, "Didn't replace value")
+    a.true(f1.w is f2.w, "Didn't share unchanged branch")
+
+    f3 = f2.replace("x.q.r", {"s" : [1]})
+    a.equals(f3.x.q.r.s, (1,), "Didn't create missing path")
+    a.true(f3.x.y is f2.x.y, "Didn't share unchanged sibling")
+    a.false("q" in f2.x, "Changed original")
+
+  def test_pickles_as_plain_dict(self):
+    a = Assert()
+    src = {"x" : {"y" : [1, 2]}, "z" : "z" * 100}
+    i = Dynamic(src)
+
+    data = pickle.dumps(i, pickle.HIGHEST_PROTOCOL)
+    a.true(len(data) < len(pickle.dumps(src, pickle.HIGHEST_PROTOCOL)) + 64, "Didn't pickle compactly")
+    a.equals(pickle.loads(data).x.y, [1, 2], "Didn't unpickle value")
+
+    f = i.freeze()
+    a.true(pickle.loads(pickle.dumps(f)) == f, "Didn't unpickle FrozenDynamic")
+
+  def test_pickles_method_named_keys(self):
+    a = Assert()
+    i = Dynamic({"to_dict" : 1, "x" : {"y" : 2}})
+    a.equals(pickle.loads(pickle.dumps(i)).x.y, 2, "Didn't pickle Dynamic")
+    a.equals(pickle.loads(pickle.dumps(i.freeze())).to_dict, 1, "Didn't pickle FrozenDynamic")
+    a.equals(Dynamic.from_bytes(Dynamic.to_bytes(i)).to_dict, 1, "Didn't encode Dynamic")
+
+  def test_deepcopy_does_not_vivify(self):
+    a = Assert()
+    i = Dynamic({"x" : {"y" : 1}})
+    c = copy.deepcopy(i)
+    c.x.y = 2
+    a.equals(i.x.y, 1, "Didn't copy value")
+    a.equals(list(i.keys()), ["x"], "Created special method key")
+
+  def test_can_encode_as_bytes(self):
+    a = Assert()
+    i = Dynamic({"x" : {"y" : [1, 2]}, "z" : 1.5})
+    a.equals(Dynamic.from_bytes(i.to_bytes()).x.y, [1, 2], "Didn't decode marshal")
+    try:
+      import msgpack
+    except ImportError:
+      return
+    a.equals(Dynamic.from_bytes(i.to_bytes("msgpack"), "msgpack").z, 1.5, "Didn't decode msgpack")
+
+  def test_can_delete_keys(self):
+    a = Assert()
+    i = Dynamic({"x" : {"y" : 1}, "z" : 2})
+    l = Dynamic({"x" : 1, "z" : 2}, lazy=True)
+    i.to_dict()
+
+    del i.x.y
+    del i["z"]
+    del l.x
+    a.equals(i.to_dict(), {"x" : {}}, "Didn't delete keys")
+    a.equals(l.to_dict(), {"z" : 2}, "Didn't delete lazy key")
+
+    failed = False
+    try:
+      del i.missing
+    except AttributeError:
+      failed = True
+    a.true(failed, "Deleted missing key")
+
+  def test_journal_records_changes_by_path(self):
+    a = Assert()
+    i = Dynamic({"x" : {"y" : 1}, "z" : 2})
+    mirror = Dynamic({"x" : {"y" : 1}, "z" : 2})
+
+    i.journal()
+    i.x.y = 3
+    i.q.r = 4
+    del i.z
+    changes = i.changes()
+    a.equals(changes, [
+      ("set", ("x", "y"), 3),
+      ("set", ("q",), {}),
+      ("set", ("q", "r"), 4),
+      ("delete", ("z",))], "Didn't record changes")
+    a.equals(i.changes(), [], "Didn't clear changes")
+
+    mirror.apply(pickle.loads(pickle.dumps(changes)))
+    a.equals(mirror.to_dict(), i.to_dict(), "Didn't apply changes")
+
+    i.journal(False)
+    i.x.y = 5
+    a.equals(i.changes(), [], "Recorded changes after stopping")
+
+  def test_journals_only_track_their_own_tree(self):
+    a = Assert()
+    i = Dynamic({"x" : {"y" : 1}})
+    x = i.x
+
+    x.journal()
+    i.journal()
+    x.y = 2
+    a.equals(i.changes(), [("set", ("x", "y"), 2)], "Didn't record nested change")
+    a.equals(x.changes(), [("set", ("y",), 2)], "Didn't record change")
+
+    i.journal(False)
+    x.y = 3
+    a.equals(x.changes(), [("set", ("y",), 3)], "Nested journal stopped with parent")
+
+    x.journal(False)
+    i.journal()
+    del i.x
+    i.journal(False)
+    x.y = 4
+    a.equals(i.changes(), [], "Recorded change after stopping")
+
+  def test_diff_and_apply(self):
+    a = Assert()
+    i = Dynamic({"x" : {"y" : 1, "w" : {"v" : 1}}, "z" : 2})
+    mirror = Dynamic(i.to_dict())
+    before = i.to_dict()
+
+    i.x.y = 3
+    i.n = {"m" : 1}
+    del i.z
+    patch = Dynamic.diff(before, i)
+    a.equals(sorted(patch), [
+      ("delete", ("z",)),
+      ("set", ("n",), {"m" : 1}),
+      ("set", ("x", "y"), 3)], "Didn't diff changes")
+
+    mirror.apply(patch)
+    a.equals(mirror.to_dict(), i.to_dict(), "Didn't apply diff")
+    a.equals(Dynamic.diff(mirror, i), [], "Didn't find equal objects equal")
+
+  def test_apply_deletes_from_unpickled_dynamic(self):
+    a = Assert()
+    worker = pickle.loads(pickle.dumps(Dynamic({"x" : {"y" : 1, "w" : 2}, "z" : 2})))
+    a.equals(worker.z, 2, "Didn't read value")
+    a.equals(worker.x.w, 2, "Didn't read nested value")
+
+    worker.apply([("delete", ("z",)), ("delete", ("x", "w"))])
+    a.false("z" in worker, "Deleted key was loaded again")
+    a.false("w" in worker.x, "Deleted nested key was loaded again")
+    a.equals(worker.to_dict(), {"x" : {"y" : 1}}, "Didn't apply deletes")
+
+    l = Dynamic({"a" : 1}, lazy=True)
+    del l.a
+    a.false("a" in l, "Deleted unread key was loaded again")
+
+  def test_get_reads_paths_without_vivifying(self):
+    a = Assert()
+    i = Dynamic({"x" : {"y" : {"z" : 1}, "d" : {"e" : 2}}})
+    i.x.d = {"e" : 2}
+    l = Dynamic({"x" : {"y" : {"z" : 3}}}, lazy=True)
+
+    a.equals(i.get("x.y.z"), 1, "Didn't read path")
+    a.equals(i.get("x.d.e"), 2, "Didn't read path through dict")
+    a.equals(i.get("x.q.z", 5), 5, "Didn't return default")
+    a.false("q" in i.x, "Created missing key")
+    a.equals(l.get("x.y.z"), 3, "Didn't read lazy path")
+    a.equals(i.freeze().get("x.y.z"), 1, "Didn't read frozen path")
+
+  def test_method_named_keys_hide_methods_consistently(self):
+    a = Assert()
+    src = {"get" : 1, "x" : {"y" : 2}}
+    for i in (Dynamic(src), Dynamic(src, lazy=True)):
+      a.equals(i.get, 1, "Method hid key")
+      a.equals(Dynamic.get(i, "x.y"), 2, "Didn't read path through class")
+
+  def test_path_accessors_are_compiled_once(self):
+    a = Assert()
+    accessor = Dynamic.path("x.y")
+    a.true(accessor is Dynamic.path("x.y"), "Didn't cache accessor")
+    a.equals(accessor(Dynamic({"x" : {"y" : 1}})), 1, "Didn't read path")
+    a.null(accessor(Dynamic()), "Didn't return default")
+
+  def test_extract_reads_many_paths(self):
+    a = Assert()
+    records = [Dynamic({"x" : {"y" : i}, "z" : -i}) for i in range(3)]
+    records.append(Dynamic({"x" : {}}))
+
+    rows = list(Dynamic.extract(records, ["x.y", "z"], 0))
+    a.equals(rows, [(0, 0), (1, -1), (2, -2), (0, 0)], "Didn't extract values")
+    a.false("y" in records[3].x, "Created missing key")
+
+    records = [{"x" : {"y" : 1}, "z" : 2}, Dynamic({"x" : {"y" : 3}, "z" : 4}, lazy=True)]
+    rows = list(Dynamic.extract(records, ["x.y", "z"]))
+    a.equals(rows, [(1, 2), (3, 4)], "Didn't extract from dict and lazy records")
+    a.equals(list(Dynamic.extract(records, ["z"])), [(2,), (4,)], "Didn't extract one path")
+
+  def test_path_cache_is_bounded(self):
+    a = Assert()
+    for i in range(3000):
+      Dynamic().get("x%d.y" % i)
+    a.true(len(nark.dynamic._paths) <= 1000, "Cached every path")
+    a.equals(Dynamic({"x" : {"y" : 1}}).get("x.y"), 1, "Didn't read path after clearing cache")
+
+  def test_to_dict_allows_method_named_keys(self):
+    a = Assert()
+    i = Dynamic({"to_dict" : 1, "x" : {"to_dict" : 2}})
+    a.equals(Dynamic.to_dict(i), {"to_dict" : 1, "x" : {"to_dict" : 2}}, "Didn't convert keys")
+    a.true("to_dict" in str(i), "Didn't convert to string")
+
+  def test_frozen_dynamic_does_not_vivify(self):
+    a = Assert()
+    i = Dynamic({"x" : {"y" : [1, {"z" : 2}]}}).freeze()
+
+    a.equals(i.x.y[1].z, 2, "Didn't read frozen value")
+    a.true(isinstance(i.x.y, tuple), "Didn't freeze list")
+
+    failed = False
+    try:
+      i.missing
+    except AttributeError:
+      failed = True
+    a.true(failed, "Read missing attribute")
+
+    failed = False
+    try:
+      i["missing"]
+    except KeyError:
+      failed = True
+    a.true(failed, "Read missing item")
+    a.false("missing" in i, "Created missing key")
+
+  def test_frozen_dynamic_is_immutable_and_hashable(self):
+    a = Assert()
+    i1 = FrozenDynamic({"x" : {"y" : 1}, "z" : [1, 2]})
+    i2 = Dynamic({"x" : {"y" : 1}, "z" : [1, 2]}).freeze()
+
+    failed = False
+    try:
+      i1.x.y = 2
+    except TypeError:
+      failed = True
+    a.true(failed, "Changed frozen value")
+
+    a.equals(hash(i1), hash(i2), "Equal values had different hashes")
+    a.true(i1 == i2, "Equal values were not equal")
+    a.equals(len(set([i1, i2])), 1, "Couldn't use as set member")
+    a.equals(dict(iter(i1))["x"]["y"], 1, "Failed to convert to dict")
+
 
 if __name__ == "__main__":
   unittest.main()
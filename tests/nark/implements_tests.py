@@ -13,6 +13,8 @@
 
 from __future__ import absolute_import
 import unittest
+import weakref
+import gc
 import bootstrap
 from nark import *
 
@@ -105,6 +107,129 @@ class ImplementsTests(unittest.TestCase):
 
     a.true(failed, "Could decorate an invalid class")
 
+  def test_deferred_mode_checks_class_on_register(self):
+    a = Assert()
+
+    class IType(object):
+      def xxx(self):
+        pass
+      def yyy(self):
+        pass
+
+    previous = implements_mode(ImplementsMode.DEFERRED)
+    try:
+      @implements(IType)
+      class ImplBad(object):
+        def xxx(self):
+          pass
+    finally:
+      implements_mode(previous)
+
+    scope = Scope()
+    failed = False
+    try:
+      scope.register(ImplBad)
+    except ImplementsException:
+      e = exception()
+      a.true(e.signature["xxx"], "Didn't find existing method")
+      a.false(e.signature["yyy"], "Found missing method 'yyy'")
+      failed = True
+
+    a.true(failed, "Could register an invalid class")
+
+  def test_disabled_mode_never_checks_class(self):
+    a = Assert()
+
+    class IType(object):
+      def xxx(self):
+        pass
+
+    previous = implements_mode(ImplementsMode.DISABLED)
+    try:
+      @implements(IType)
+      class ImplBad(object):
+        pass
+    finally:
+      implements_mode(previous)
+
+    scope = Scope()
+    scope.register(ImplBad)
+    a.not_null(scope.resolve(IType), "Failed to resolve unchecked class")
+
+  def test_implementations_are_indexed_by_interface(self):
+    a = Assert()
+
+    class IType(object):
+      def xxx(self):
+        pass
+
+    class IOther(object):
+      def yyy(self):
+        pass
+
+    @implements(IType)
+    class ImplOne(object):
+      def xxx(self):
+        pass
+
+    @implements(IType, IOther)
+    class ImplTwo(object):
+      def xxx(self):
+        pass
+      def yyy(self):
+        pass
+
+    a.equals(implementations(IType), [ImplOne, ImplTwo], "Didn't index implementations")
+    a.equals(implementations(IOther), [ImplTwo], "Didn't index implementations")
+
+  def test_provides_follows_inheritance(self):
+    a = Assert()
+
+    class IBase(object):
+      def xxx(self):
+        pass
+
+    class IChild(IBase):
+      def yyy(self):
+        pass
+
+    class IOther(object):
+      def zzz(self):
+        pass
+
+    @implements(IChild)
+    class Impl(object):
+      def xxx(self):
+        pass
+      def yyy(self):
+        pass
+
+    class SubImpl(Impl):
+      pass
+
+    a.true(provides(Impl(), IChild), "Didn't find interface")
+    a.true(provides(Impl, IChild), "Didn't find interface on class")
+    a.true(provides(SubImpl(), IChild), "Didn't find inherited interface")
+    a.true(provides(SubImpl(), IBase), "Didn't find base interface")
+    a.false(provides(SubImpl(), IOther), "Found interface not implemented")
+    a.false(provides(object(), IBase), "Found interface on undecorated object")
+
+  def test_provides_does_not_keep_classes_alive(self):
+    a = Assert()
+
+    class IBase(object):
+      def xxx(self):
+        pass
+
+    class Plain(object):
+      pass
+
+    provides(Plain(), IBase)
+    ref = weakref.ref(Plain)
+    del Plain
+    gc.collect()
+    a.null(ref(), "Checked class was kept alive")
+
 
 if __name__ == "__main__":
   unittest.main()
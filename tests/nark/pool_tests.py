@@ -0,0 +1,103 @@
+# Copyright 2013 Douglas Linder
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import absolute_import
+import unittest
+import threading
+import time
+import bootstrap
+from nark import *
+
+
+class PoolTests(unittest.TestCase):
+
+  def test_instances_are_reused(self):
+    a = Assert()
+    created = []
+    pool = Pool(lambda: created.append(1) or len(created), 2)
+
+    i1 = pool.checkout()
+    pool.checkin(i1)
+    i2 = pool.checkout()
+
+    a.equals(i1, i2, "Didn't reuse idle instance")
+    a.equals(len(created), 1, "Created a new instance while one was idle")
+
+  def test_exhausted_pool_times_out(self):
+    a = Assert()
+    pool = Pool(object, 1, timeout=0.1)
+    pool.checkout()
+
+    failed = False
+    try:
+      pool.checkout()
+    except PoolExhaustedException:
+      failed = True
+    a.true(failed, "Checked out more than the pool size")
+
+  def test_exhausted_pool_waits_for_checkin(self):
+    a = Assert()
+    pool = Pool(object, 1)
+    i1 = pool.checkout()
+
+    def worker():
+      time.sleep(0.1)
+      pool.checkin(i1)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    i2 = pool.checkout()
+    t.join()
+
+    a.true(i1 is i2, "Didn't wait for the checked in instance")
+
+  def test_overflow_instances_are_discarded(self):
+    a = Assert()
+    created = []
+    pool = Pool(lambda: created.append(1) or len(created), 1, overflow=True)
+
+    i1 = pool.checkout()
+    i2 = pool.checkout()
+    a.equals(len(created), 2, "Didn't create an overflow instance")
+
+    pool.checkin(i1)
+    pool.checkin(i2)
+    i3 = pool.checkout()
+    i4 = pool.checkout()
+    a.equals(len(created), 3, "Kept an overflow instance")
+
+
+  def test_only_overflow_instances_are_closed(self):
+    a = Assert()
+
+    class Cursor(object):
+      def __init__(self):
+        self.closed = False
+      def close(self):
+        self.closed = True
+
+    pool = Pool(Cursor, 1, overflow=True)
+    pooled = pool.checkout()
+    extra = pool.checkout()
+
+    pool.checkin(pooled)
+    a.true(pool.checkout() is pooled, "Discarded the pooled instance")
+    a.false(pooled.closed, "Closed the pooled instance")
+
+    pool.checkin(extra)
+    a.true(extra.closed, "Didn't close the overflow instance")
+    pool.checkin(pooled)
+    a.true(pool.checkout() is pooled, "Kept the overflow instance")
+
+if __name__ == "__main__":
+  unittest.main()
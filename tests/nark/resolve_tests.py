@@ -13,6 +13,13 @@
 
 from __future__ import absolute_import
 import unittest
+import threading
+import functools
+import sys
+import os
+import weakref
+import time
+import gc
 import bootstrap
 from nark import *
 
@@ -462,6 +469,896 @@ class ResolverTests(unittest.TestCase):
       a.equals(e.type, IPrinter, "Didnt set correct exception value")
     a.true(failed, "Didn't fail")
 
+  def test_injection_plan_only_includes_class_defaults(self):
+
+    class IPrinter(object):
+      def prints(self, msg):
+        pass
+
+    class IValuer(object):
+      def value(self, a, b):
+        pass
+
+    class HasDeps(object):
+      def __init__(self, x, y=10, valuer=IValuer, name="name", printer=IPrinter):
+        pass
+
+    a = Assert()
+
+    plan = injection_plan(HasDeps.__init__)
+
+    a.equals(plan, [("valuer", IValuer), ("printer", IPrinter)], "Invalid injection plan")
+
+  def test_non_class_defaults_are_not_resolved(self):
+
+    class IValuer(object):
+      def value(self, a, b):
+        pass
+
+    @implements(IValuer)
+    class Valuer(object):
+      def value(self, a, b):
+        return a + b
+
+    @resolve([Valuer])
+    class HasDeps(object):
+      def __init__(self, x, y=10, valuer=IValuer, name="name"):
+        self.x = x
+        self.y = y
+        self.valuer = valuer
+        self.name = name
+
+    a = Assert()
+
+    instance = HasDeps(5, name="other")
+
+    a.equals(instance.x, 5, "Invalid x value")
+    a.equals(instance.y, 10, "Invalid y value")
+    a.equals(instance.name, "other", "Invalid name value")
+    a.equals(instance.valuer.value(1, 2), 3, "Failed to resolve valuer")
+
+  def test_singleton_is_constructed_once_under_many_threads(self):
+
+    class IDb(object):
+      def data(self):
+        pass
+
+    created = []
+    created_lock = threading.Lock()
+
+    @implements(IDb)
+    class Db(object):
+      def __init__(self):
+        with created_lock:
+          created.append(self)
+        time.sleep(0.05)  # Slow construction widens the race
+      def data(self):
+        return 10
+
+    scope = Scope()
+    scope.register(Db)
+
+    start = threading.Event()
+    results = []
+
+    def worker():
+      start.wait()
+      results.append(scope.resolve(IDb))
+
+    threads = [threading.Thread(target=worker) for _ in range(32)]
+    for t in threads:
+      t.start()
+    start.set()
+    for t in threads:
+      t.join()
+
+    a = Assert()
+    a.equals(len(created), 1, "Singleton was constructed more than once")
+    a.equals(len(results), 32, "Not every thread resolved an instance")
+    a.true(all(r is created[0] for r in results), "Threads got different instances")
+
+  def test_per_request_instances_are_shared_and_closed_within_block(self):
+
+    class IDb(object):
+      def data(self):
+        pass
+
+    closed = []
+
+    @implements(IDb)
+    class Db(object):
+      def data(self):
+        return 10
+      def close(self):
+        closed.append(self)
+
+    scope = Scope()
+    scope.register(Db, per_request=True)
+
+    a = Assert()
+
+    with scope.request():
+      i1 = scope.resolve(IDb)
+      i2 = scope.resolve(IDb)
+      a.true(i1 is i2, "Request instance was not shared in the block")
+      a.equals(len(closed), 0, "Instance closed before end of the block")
+
+    a.equals(closed, [i1], "Request instance was not closed on exit")
+
+    with scope.request():
+      i3 = scope.resolve(IDb)
+    a.true(i3 is not i1, "Request instance leaked between blocks")
+
+  def test_per_request_instances_are_released_when_thread_ends(self):
+
+    class IDb(object):
+      def data(self):
+        pass
+
+    @implements(IDb)
+    class Db(object):
+      def data(self):
+        return 10
+
+    scope = Scope()
+    scope.register(Db, per_request=True)
+
+    refs = []
+
+    def worker():
+      i1 = scope.resolve(IDb)
+      i2 = scope.resolve(IDb)
+      if i1 is i2:
+        refs.append(weakref.ref(i1))
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    gc.collect()
+
+    a = Assert()
+    a.equals(len(refs), 1, "Thread instance was not shared in the thread")
+    a.null(refs[0](), "Thread instance outlived its thread")
+
+  def test_child_scope_inherits_and_overrides_bindings(self):
+
+    class IPrinter(object):
+      def prints(self, msg):
+        pass
+
+    class IValuer(object):
+      def value(self, a, b):
+        pass
+
+    @implements(IPrinter)
+    class Printer(object):
+      def prints(self, msg):
+        return "prints-" + str(msg)
+
+    @implements(IPrinter)
+    class OtherPrinter(object):
+      def prints(self, msg):
+        return "other-" + str(msg)
+
+    @implements(IValuer)
+    class Valuer(object):
+      def value(self, a, b):
+        return a + b
+
+    parent = Scope()
+    parent.register(Printer)
+    parent.register(Valuer)
+
+    child = parent.child()
+    child.register(OtherPrinter)
+
+    a = Assert()
+
+    a.equals(child.resolve(IPrinter).prints("x"), "other-x", "Child didn't override binding")
+    a.equals(parent.resolve(IPrinter).prints("x"), "prints-x", "Child override leaked into parent")
+    a.true(child.resolve(IValuer) is parent.resolve(IValuer), "Child didn't share inherited singleton")
+
+  def test_child_scope_sees_later_parent_registrations(self):
+
+    class IPrinter(object):
+      def prints(self, msg):
+        pass
+
+    class IValuer(object):
+      def value(self, a, b):
+        pass
+
+    @implements(IPrinter)
+    class Printer(object):
+      def prints(self, msg):
+        return "prints-" + str(msg)
+
+    @implements(IValuer)
+    class Valuer(object):
+      def value(self, a, b):
+        return a + b
+
+    root = Scope()
+    root.register(Printer)
+    middle = root.child()
+    leaf = middle.child()
+    leaf.register(Printer)
+
+    a = Assert()
+
+    a.not_null(leaf.resolve(IPrinter), "Failed to resolve from leaf")
+
+    failed = False
+    try:
+      leaf.resolve(IValuer)
+    except ResolveFailedException:
+      failed = True
+    a.true(failed, "Resolved a missing type")
+
+    root.register(Valuer)
+    a.equals(leaf.resolve(IValuer).value(1, 2), 3, "Leaf cache wasn't invalidated by root")
+    a.true(leaf.resolve(IPrinter) is not root.resolve(IPrinter), "Leaf override was lost")
+
+  def test_lazy_binding_is_created_on_first_use(self):
+
+    class IDb(object):
+      def data(self):
+        pass
+
+    created = []
+
+    @implements(IDb)
+    class Db(object):
+      def __init__(self):
+        created.append(self)
+      def data(self):
+        return 10
+
+    scope = Scope()
+    scope.register(Db, lazy=True)
+
+    @resolve(scope)
+    class UsesDb(object):
+      def __init__(self, db=IDb):
+        self.db = db
+
+    a = Assert()
+
+    i1 = UsesDb()
+    i2 = UsesDb()
+    a.equals(len(created), 0, "Lazy binding was created eagerly")
+
+    a.equals(i1.db.data(), 10, "Lazy proxy didn't forward call")
+    a.equals(i2.db.data(), 10, "Lazy proxy didn't forward call")
+    a.equals(len(created), 1, "Lazy singleton was created more than once")
+    a.true(isinstance(i1.db, Db), "Lazy proxy didn't forward isinstance")
+
+  def test_bindings_inject_through_other_init_decorators(self):
+
+    class IDb(object):
+      def data(self):
+        pass
+
+    class ICache(object):
+      def get(self):
+        pass
+
+    def logged(fn):
+      @functools.wraps(fn)
+      def wrapper(*args, **kwargs):
+        return fn(*args, **kwargs)
+      return wrapper
+
+    @implements(IDb)
+    class Db(object):
+      def data(self):
+        return 10
+
+    @implements(ICache)
+    class Cache(object):
+      @logged
+      def __init__(self, db=IDb):
+        self.db = db
+      def get(self):
+        return self.db.data()
+
+    scope = Scope()
+    scope.register(Db)
+    scope.register(Cache)
+
+    a = Assert()
+    a.equals(scope.resolve(ICache).get(), 10, "Didn't inject decorated __init__")
+
+  def test_lazy_proxies_do_not_block_each_other(self):
+
+    class IX(object):
+      def data(self):
+        pass
+
+    class IY(object):
+      def data(self):
+        pass
+
+    class IZ(object):
+      def data(self):
+        pass
+
+    scope = Scope()
+    started = threading.Event()
+
+    @implements(IY)
+    class Y(object):
+      def data(self):
+        return 1
+
+    @implements(IX)
+    class X(object):
+      def __init__(self, y=IY):
+        started.set()
+        time.sleep(0.1)
+        self.value = y.data()
+      def data(self):
+        return self.value
+
+    @implements(IZ)
+    class Z(object):
+      def __init__(self, x=IX):
+        self.x = x
+      def data(self):
+        return self.x.data()
+
+    scope.register(Y, lazy=True)
+    scope.register(X)
+    scope.register(Z, lazy=True)
+    z = scope.resolve(IZ)
+
+    results = []
+    t1 = threading.Thread(target=lambda: results.append(scope.resolve(IX).data()))
+    t2 = threading.Thread(target=lambda: (started.wait(), results.append(z.data())))
+    for t in (t1, t2):
+      t.daemon = True
+      t.start()
+    for t in (t1, t2):
+      t.join(5)
+
+    a = Assert()
+    a.equals(results, [1, 1], "Lazy proxies deadlocked")
+
+  def test_warmup_creates_singletons_dependencies_first(self):
+
+    class IDb(object):
+      def data(self):
+        pass
+
+    class ICache(object):
+      def get(self):
+        pass
+
+    class IThing(object):
+      def thing(self):
+        pass
+
+    created = []
+    scope = Scope()
+
+    @implements(IDb)
+    class Db(object):
+      def __init__(self):
+        time.sleep(0.05)
+        created.append("db")
+      def data(self):
+        return 10
+
+    @implements(ICache)
+    @resolve(scope)
+    class Cache(object):
+      def __init__(self, db=IDb):
+        created.append("cache")
+        self.db = db
+      def get(self):
+        return self.db.data()
+
+    @implements(IThing)
+    class Thing(object):
+      def __init__(self):
+        created.append("thing")
+      def thing(self):
+        pass
+
+    scope.register(Db)
+    scope.register(Cache)
+    scope.register(Thing, per_call=True)
+    scope.warmup(max_workers=4)
+
+    a = Assert()
+    a.equals(sorted(created), ["cache", "db"], "Didn't create exactly the singletons")
+    a.equals(created.index("db"), 0, "Created a dependant before its dependency")
+    a.equals(scope.resolve(ICache).get(), 10, "Warm singleton didn't work")
+    a.equals(len(created), 2, "Resolve after warmup created a new singleton")
+
+  def test_warmup_creates_independent_singletons_concurrently(self):
+
+    scope = Scope()
+    for i in range(4):
+      IType = type("IType%d" % i, (object,), {})
+      Impl = implements(IType)(type("Impl%d" % i, (object,), {"__init__" : lambda self: time.sleep(0.2)}))
+      scope.register(Impl)
+
+    started = time.time()
+    scope.warmup(max_workers=4)
+    elapsed = time.time() - started
+
+    a = Assert()
+    a.true(elapsed < 0.6, "Singletons were not created concurrently")
+
+  def test_warmup_raises_failures(self):
+
+    class IPrinter(object):
+      def prints(self, msg):
+        pass
+
+    @implements(IPrinter)
+    class Printer(object):
+      def __init__(self, value):  # <-- Not resolvable
+        pass
+      def prints(self, msg):
+        pass
+
+    scope = Scope()
+    scope.register(Printer)
+
+    a = Assert()
+
+    failed = False
+    try:
+      scope.warmup()
+    except ResolveFailedException:
+      e = exception()
+      a.equals(e.type, Printer, "Didnt set correct exception value")
+      failed = True
+    a.true(failed, "Warmup didn't fail")
+
+  def test_scope_injects_implementation_dependencies(self):
+
+    class IDb(object):
+      def data(self):
+        pass
+
+    class ICache(object):
+      def get(self):
+        pass
+
+    @implements(IDb)
+    class Db(object):
+      def data(self):
+        return 10
+
+    @implements(ICache)
+    class Cache(object):
+      def __init__(self, db=IDb, factory=dict):
+        self.db = db
+        self.values = factory()
+      def get(self):
+        return self.db.data()
+
+    scope = Scope()
+    scope.register(Cache, per_call=True)
+    scope.register(Db)
+
+    a = Assert()
+
+    cache = scope.resolve(ICache)
+    a.equals(cache.get(), 10, "Failed to inject implementation dependency")
+    a.equals(cache.values, {}, "Replaced unbound default")
+    a.true(cache.db is scope.resolve(IDb), "Didn't inject singleton dependency")
+
+  def test_dependency_cycles_fail(self):
+
+    class IEgg(object):
+      def egg(self):
+        pass
+
+    class IChicken(object):
+      def chicken(self):
+        pass
+
+    @implements(IEgg)
+    class Egg(object):
+      def __init__(self, chicken=IChicken):
+        pass
+      def egg(self):
+        pass
+
+    @implements(IChicken)
+    class Chicken(object):
+      def __init__(self, egg=IEgg):
+        pass
+      def chicken(self):
+        pass
+
+    scope = Scope()
+    scope.register(Egg)
+    scope.register(Chicken)
+
+    a = Assert()
+
+    failed = False
+    try:
+      scope.resolve(IEgg)
+    except ResolveFailedException:
+      e = exception()
+      a.trace(e)
+      a.true("Egg -> Chicken -> Egg" in str(e), "Didn't report the cycle")
+      failed = True
+    a.true(failed, "Resolved a dependency cycle")
+
+  def test_pooled_binding_is_returned_at_end_of_request(self):
+
+    class IParser(object):
+      def parse(self):
+        pass
+
+    created = []
+
+    @implements(IParser)
+    class Parser(object):
+      def __init__(self):
+        created.append(self)
+      def parse(self):
+        return 10
+      def close(self):
+        raise Exception("Pooled instance was closed")
+
+    scope = Scope()
+    scope.register(Parser, pool=1, pool_timeout=0.1)
+
+    a = Assert()
+
+    with scope.request():
+      i1 = scope.resolve(IParser)
+      a.true(scope.resolve(IParser) is i1, "Request checked out two instances")
+
+    with scope.request():
+      i2 = scope.resolve(IParser)
+      a.true(i1 is i2, "Pooled instance wasn't reused")
+      failed = False
+      try:
+        with scope.request():
+          scope.resolve(IParser)
+      except ResolveFailedException:
+        failed = True
+      a.true(failed, "Resolved from an exhausted pool")
+
+    failed = False
+    try:
+      scope.resolve(IParser)
+    except ResolveFailedException:
+      failed = True
+    a.true(failed, "Resolved a pooled binding outside a request")
+    a.equals(len(created), 1, "Created more than the pool size")
+
+  def test_stats_count_resolves_and_constructions(self):
+
+    class IPrinter(object):
+      def prints(self, msg):
+        pass
+
+    class IValuer(object):
+      def value(self, a, b):
+        pass
+
+    @implements(IPrinter)
+    class Printer(object):
+      def prints(self, msg):
+        return "prints-" + str(msg)
+
+    @implements(IValuer)
+    class Valuer(object):
+      def __init__(self, value):  # <-- Not resolvable
+        pass
+      def value(self, a, b):
+        return a + b
+
+    scope = Scope(stats=True)
+    scope.register(Printer)
+    scope.register(Valuer, per_call=True)
+
+    for _ in range(3):
+      scope.resolve(IPrinter)
+      try:
+        scope.resolve(IValuer)
+      except ResolveFailedException:
+        pass
+
+    a = Assert()
+    stats = scope.stats()
+
+    a.equals(stats[Printer]["resolves"], 3, "Didn't count resolves")
+    a.equals(stats[Printer]["hits"], 2, "Didn't count singleton hits")
+    a.equals(stats[Printer]["constructions"], 1, "Didn't count constructions")
+    a.equals(sum(c for _, c in stats[Printer]["histogram"]), 1, "Didn't record creation time")
+    a.equals(stats[Valuer]["failures"], 3, "Didn't count failures")
+    a.equals(stats[Valuer]["hits"], 0, "Counted per_call failures as hits")
+    a.equals(Scope().stats(), {}, "Collected stats when disabled")
+
+    scope = Scope(stats=True)
+    scope.register(Printer, per_call=True, lazy=True)
+    scope.resolve(IPrinter)
+    scope.resolve(IPrinter)
+    a.equals(scope.stats()[Printer]["hits"], 0, "Counted unused lazy resolves as hits")
+
+  def test_frozen_scope_keeps_binding_lifetimes(self):
+
+    class IPrinter(object):
+      def prints(self, msg):
+        pass
+
+    class IValuer(object):
+      def value(self, a, b):
+        pass
+
+    class IDb(object):
+      def data(self):
+        pass
+
+    @implements(IPrinter)
+    class Printer(object):
+      def prints(self, msg):
+        return "prints-" + str(msg)
+
+    @implements(IValuer)
+    class Valuer(object):
+      def value(self, a, b):
+        return a + b
+
+    @implements(IDb)
+    class Db(object):
+      def data(self):
+        return 10
+
+    class IMissing(object):
+      pass
+
+    class IConn(object):
+      def query(self):
+        pass
+
+    class ICache(object):
+      def get(self):
+        pass
+
+    class IFlags(object):
+      def flags(self):
+        pass
+
+    class IReport(object):
+      def render(self):
+        pass
+
+    @implements(IConn)
+    class Conn(object):
+      def query(self):
+        return "query"
+
+    @implements(ICache)
+    class Cache(object):
+      def get(self):
+        return "cached"
+
+    @implements(IFlags)
+    class Flags(object):
+      def flags(self):
+        return {}
+
+    @implements(IReport)
+    class Report(object):
+      def __init__(self, db=IDb):
+        self.db = db
+      def render(self):
+        return self.db.data()
+
+    scope = Scope()
+    scope.register(Printer)
+    scope.register(Valuer, per_call=True)
+    scope.register(Conn, per_request=True)
+    scope.register(Cache, pool=2)
+    scope.register(Flags, ttl=60)
+    scope.register(Report, per_call=True)
+    scope.freeze()
+
+    a = Assert()
+
+    p1 = scope.resolve(IPrinter)
+    a.true(p1 is scope.resolve(IPrinter), "Frozen singleton wasn't shared")
+    a.true(scope.resolve(IValuer) is not scope.resolve(IValuer), "Frozen per_call was shared")
+
+    scope.clear()
+    a.true(p1 is not scope.resolve(IPrinter), "Frozen singleton wasn't cleared")
+
+    scope.register(Db, lazy=True)
+    a.equals(scope.resolve(IDb).data(), 10, "Register after freeze was lost")
+    scope.freeze()
+    a.equals(scope.resolve(IDb).data(), 10, "Failed to resolve refrozen lazy binding")
+
+    with scope.request():
+      c = scope.resolve(IConn)
+      a.true(c is scope.resolve(IConn), "Frozen per_request wasn't shared in request")
+      a.equals(scope.resolve(ICache).get(), "cached", "Failed to resolve frozen pooled binding")
+    f = scope.resolve(IFlags)
+    a.true(f is scope.resolve(IFlags), "Frozen ttl binding wasn't shared")
+    r = scope.resolve(IReport)
+    a.true(r is not scope.resolve(IReport), "Frozen injected per_call was shared")
+    a.equals(r.render(), 10, "Frozen per_call wasn't injected")
+
+    failed = False
+    try:
+      scope.resolve(IMissing)
+    except ResolveFailedException:
+      failed = True
+    a.true(failed, "Resolved a missing type")
+
+  def test_ttl_singleton_is_refreshed_in_background(self):
+
+    class IFlags(object):
+      def flags(self):
+        pass
+
+    created = []
+
+    @implements(IFlags)
+    class Flags(object):
+      def __init__(self):
+        if created:
+          time.sleep(0.2)  # Slow refresh
+        created.append(self)
+      def flags(self):
+        return {}
+
+    scope = Scope()
+    scope.register(Flags, ttl=0.1)
+
+    a = Assert()
+
+    i1 = scope.resolve(IFlags)
+    a.true(scope.resolve(IFlags) is i1, "Singleton refreshed before expiry")
+
+    time.sleep(0.15)
+    started = time.time()
+    stale = scope.resolve(IFlags)
+    a.true(time.time() - started < 0.1, "Resolve waited for the refresh")
+    a.true(stale is i1, "Expired singleton wasn't served while refreshing")
+
+    time.sleep(0.3)
+    a.true(scope.resolve(IFlags) is created[-1], "Refreshed singleton wasn't used")
+    a.equals(len(created), 2, "Singleton wasn't refreshed exactly once")
+
+  def test_ttl_counts_from_creation(self):
+
+    class IFlags(object):
+      def flags(self):
+        pass
+
+    created = []
+
+    @implements(IFlags)
+    class Flags(object):
+      def __init__(self):
+        created.append(self)
+      def flags(self):
+        return {}
+
+    scope = Scope()
+    scope.register(Flags, ttl=0.1)
+    scope.warmup()
+
+    time.sleep(0.15)
+    scope.resolve(IFlags)
+    time.sleep(0.1)
+
+    a = Assert()
+    a.equals(len(created), 2, "Warmed up singleton wasn't refreshed after expiry")
+
+  def test_can_inject_into_function(self):
+
+    class IPrinter(object):
+      def prints(self, msg):
+        pass
+
+    class IValuer(object):
+      def value(self, a, b):
+        pass
+
+    @implements(IPrinter)
+    class Printer(object):
+      def prints(self, msg):
+        return "prints-" + str(msg)
+
+    @implements(IValuer)
+    class Valuer(object):
+      def value(self, a, b):
+        return a + b
+
+    class MockValuer(object):
+      def value(self, a, b):
+        return 0
+
+    @inject([Printer, Valuer])
+    def handler(msg, valuer=IValuer, count=2, printer=IPrinter):
+      """ Handles things """
+      return printer.prints(valuer.value(count, 1)) + msg
+
+    a = Assert()
+
+    a.equals(handler("!"), "prints-3!", "Failed to inject function")
+    a.equals(handler("!", MockValuer()), "prints-0!", "Resolved positional argument")
+    a.equals(handler("!", valuer=MockValuer()), "prints-0!", "Resolved keyword argument")
+    a.equals(handler.__name__, "handler", "Didn't keep function name")
+    a.equals(handler.__doc__, " Handles things ", "Didn't keep function doc")
+
+  @unittest.skipIf(sys.version_info < (3,), "Keyword-only arguments are python 3")
+  def test_can_inject_keyword_only_arguments(self):
+
+    class IPrinter(object):
+      def prints(self, msg):
+        pass
+
+    @implements(IPrinter)
+    class Printer(object):
+      def prints(self, msg):
+        return "prints-" + str(msg)
+
+    class MockPrinter(object):
+      def prints(self, msg):
+        return "mock-" + str(msg)
+
+    namespace = {"IPrinter" : IPrinter}
+    exec("def handler(msg, *, printer=IPrinter, suffix='!'):\n  return printer.prints(msg) + suffix", namespace)
+    handler = namespace["handler"]
+
+    a = Assert()
+
+    a.equals(injection_plan(handler), [("printer", IPrinter)], "Invalid keyword-only injection plan")
+    handler = inject([Printer])(handler)
+    a.equals(handler("x"), "prints-x!", "Failed to inject keyword-only argument")
+    a.equals(handler("x", printer=MockPrinter(), suffix="?"), "mock-x?", "Resolved passed keyword-only argument")
+
+  def test_can_inject_into_method(self):
+
+    class IValuer(object):
+      def value(self, a, b):
+        pass
+
+    @implements(IValuer)
+    class Valuer(object):
+      def value(self, a, b):
+        return a + b
+
+    scope = Scope()
+    scope.register(Valuer)
+
+    class Handler(object):
+      @inject(scope)
+      def handle(self, a, b, valuer=IValuer):
+        return valuer.value(a, b)
+
+    a = Assert()
+    a.equals(Handler().handle(1, 2), 3, "Failed to inject method")
+
+  def test_can_autoregister_package(self):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+    try:
+      import plugins
+      scope = Scope()
+      scope.autoregister("plugins")
+      other = Scope()
+      other.autoregister(plugins)
+    finally:
+      sys.path.pop(0)
+
+    a = Assert()
+    a.equals(scope.resolve(plugins.IShouter).shout("bob"), "HELLO BOB", "Failed to autoregister package")
+    a.equals(other.resolve(plugins.IGreeter).greet("bob"), "hello bob", "Failed to autoregister module")
+
 
 if __name__ == "__main__":
   unittest.main()
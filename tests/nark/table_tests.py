@@ -0,0 +1,88 @@
+# Copyright 2013 Douglas Linder
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at:
+# 
+#   http://www.apache.org/licenses/LICENSE-2.0
+# 
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import bootstrap
+from nark import *
+
+
+def record(i):
+  return {"id" : i, "name" : "record %d" % i, "data" : {"x" : i * 1.5, "y" : {"z" : "z"}}}
+
+
+class DynamicTableTests(unittest.TestCase):
+
+  def test_can_create_table(self):
+    a = Assert()
+    table = DynamicTable([record(i) for i in range(3)])
+    a.equals(len(table), 3, "Didn't add records")
+    a.equals(table.columns(), ["data.x", "data.y.z", "id", "name"], "Didn't find columns")
+
+  def test_rows_behave_like_dynamic(self):
+    a = Assert()
+    table = DynamicTable(Dynamic(record(i)) for i in range(3))
+
+    row = table[1]
+    a.equals(row.id, 1, "Didn't read value")
+    a.equals(row.data.y.z, "z", "Didn't read nested value")
+    a.equals(row["data"]["x"], 1.5, "Didn't read item")
+    a.equals(table[-1].name, "record 2", "Didn't read negative index")
+    a.equals(dict(iter(row)), record(1), "Didn't convert to dict")
+    a.equals(row.get("data.q.z", 0), 0, "Didn't return default")
+    a.equals([r.id for r in table], [0, 1, 2], "Didn't iterate over rows")
+
+    failed = False
+    try:
+      row.missing
+    except AttributeError:
+      failed = True
+    a.true(failed, "Read missing key")
+
+  def test_rows_can_change_values(self):
+    a = Assert()
+    table = DynamicTable([record(i) for i in range(3)])
+    table[0].id = "zero"
+    table[1].data.x = 10.0
+    a.equals(table.column("id")[0], "zero", "Didn't change value")
+    a.equals(list(table.column("id")), ["zero", 1, 2], "Didn't keep other values")
+    a.equals(table[1].data.x, 10.0, "Didn't change nested value")
+
+  def test_columns_are_vectors(self):
+    a = Assert()
+    table = DynamicTable([record(i) for i in range(4)])
+    table.append({"id" : 2 ** 70, "name" : "big", "data" : {"x" : 0.0, "y" : {"z" : "z"}}})
+    a.equals(sum(table.column("data.x")), 9.0, "Didn't read column")
+    a.equals(list(table.column("id")), [0, 1, 2, 3, 2 ** 70], "Didn't store overflowing value")
+
+  def test_can_append_after_reading_column(self):
+    a = Assert()
+    table = DynamicTable([record(i) for i in range(2)])
+    ids = table.column("id")
+    table.append(record(2))
+    a.equals(list(ids), [0, 1], "Changed column read before append")
+    a.equals(list(table.column("id")), [0, 1, 2], "Didn't append after reading column")
+
+  def test_records_must_have_same_shape(self):
+    a = Assert()
+    table = DynamicTable([record(0)])
+    failed = False
+    try:
+      table.append({"id" : 1})
+    except ValueError:
+      failed = True
+    a.true(failed, "Added record with different keys")
+    a.equals(len(table), 1, "Changed table after error")
+
+
+if __name__ == "__main__":
+  unittest.main()